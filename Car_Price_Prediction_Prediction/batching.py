@@ -0,0 +1,92 @@
+import asyncio
+
+class MicroBatcher:
+    # Coalesces concurrent single-row requests into one vectorized call.
+    #
+    # submit() enqueues a row and awaits its result. A single consumer task takes the first queued
+    # row, waits max_wait_ms for concurrent requests to join (unless max_batch_size rows are already
+    # queued), then runs predict_fn(rows) in the default thread pool so the event loop stays free.
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, row):
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent requests one window to join, then take whatever is queued
+            if self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Requests that were cancelled while queued (client went away) are dropped
+            batch = [(row, future) for row, future in batch if not future.done()]
+            if not batch:
+                continue
+            rows = [row for row, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self._predict_with_fallback, rows)
+            except Exception as e:
+                results = [e] * len(rows)
+
+            self.batches += 1
+            self.rows += len(rows)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _predict_with_fallback(self, rows):
+        # If the batch fails as a whole, score rows one by one so a single bad row
+        # only fails its own request
+        try:
+            return list(self.predict_fn(rows))
+        except Exception:
+            if len(rows) == 1:
+                raise
+        results = []
+        for row in rows:
+            try:
+                results.append(self.predict_fn([row])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
@@ -0,0 +1,60 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Cold start of the API: seconds from spawning uvicorn until /health first answers (the process is
+# live) and until /ready returns 200 (model and data loaded). Trees without /ready (before background
+# loading) load everything at import, so there the first /health answer is also readiness.
+
+# Probe interval; kept coarse enough that the probes themselves do not slow down the loading server
+POLL_SECONDS = 0.02
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def cold_start(project_dir, timeout=120.0, env=None):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+                               '--log-level', 'warning'], cwd=project_dir, stdout=subprocess.DEVNULL,
+                              env=dict(os.environ, PYTHONPATH=project_dir, **(env or {})))
+    live = ready = None
+    try:
+        with httpx.Client(base_url=base_url, timeout=1.0) as client:
+            while ready is None and time.perf_counter() - start < timeout:
+                try:
+                    if live is None and client.get('/health').status_code == 200:
+                        live = time.perf_counter() - start
+                    if live is not None:
+                        status = client.get('/ready').status_code
+                        if status == 200 or status == 404:
+                            ready = live if status == 404 else time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+                time.sleep(POLL_SECONDS)
+    finally:
+        server.terminate()
+        server.wait()
+    return live, ready
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API time-to-live and time-to-ready")
+    parser.add_argument('--project-dir', default=PROJECT_DIR, help="Tree to start (e.g. a worktree of an older commit)")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [cold_start(args.project_dir) for _ in range(args.runs)]
+    for name, index in (('health (live)', 0), ('ready', 1)):
+        values = sorted(r[index] for r in results if r[index] is not None)
+        if values:
+            print(f"{name:<14} median {values[len(values) // 2]:.3f}s  min {values[0]:.3f}s  max {values[-1]:.3f}s")
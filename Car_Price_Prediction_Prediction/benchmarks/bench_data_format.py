@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_store import save_dataset
+from synthetic import generate_listings
+
+# Compares loading the cleaned dataset from CSV against the columnar format.
+# Every measurement runs in a fresh interpreter so peak RSS is not polluted by earlier runs.
+
+LOADER = r'''
+import json, sys, time
+sys.path.insert(0, {project_dir!r})
+import pandas as pd
+from data_store import load_dataset
+
+def status_mb(field):
+    # VmRSS is the current resident set, VmHWM its high-water mark (reset on exec, unlike ru_maxrss)
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+
+baseline = status_mb('VmRSS')
+start = time.perf_counter()
+df = pd.read_csv({path!r}) if {path!r}.endswith('.csv') else load_dataset({path!r})
+load_s = time.perf_counter() - start
+# One full pass over the data so lazily mapped columns are actually paged in
+df.groupby('Brand', observed=True)['Price'].mean()
+total_s = time.perf_counter() - start
+print(json.dumps({{'load_s': load_s, 'load_and_scan_s': total_s,
+                  'rss_mb': status_mb('VmRSS') - baseline, 'peak_rss_mb': status_mb('VmHWM') - baseline}}))
+'''
+
+def measure(path):
+    code = LOADER.format(project_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path=path)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs columnar dataset loading")
+    parser.add_argument('--rows', default='2500,1000000,10000000', help="Comma separated dataset sizes")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':>8} {'size MB':>8} {'load s':>8} {'load+scan s':>12} {'RSS MB':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in [int(n) for n in args.rows.split(',')]:
+            df = generate_listings(n_rows)
+            csv_path = os.path.join(tmp, f"listings_{n_rows}.csv")
+            cols_path = os.path.join(tmp, f"listings_{n_rows}.cols")
+            df.to_csv(csv_path, index=False)
+            save_dataset(df, cols_path)
+            del df
+
+            for fmt, path in (('csv', csv_path), ('columnar', cols_path)):
+                if os.path.isdir(path):
+                    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                else:
+                    size = os.path.getsize(path)
+                result = measure(path)
+                print(f"{n_rows:>10} {fmt:>8} {size / 2 ** 20:>8.1f} {result['load_s']:>8.3f} "
+                      f"{result['load_and_scan_s']:>12.3f} {result['rss_mb']:>8.1f} {result['peak_rss_mb']:>8.1f}")
@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('CAR_API_FAST_SCORER', '0')
+import main
+from batching import MicroBatcher
+from load_test import car_payloads
+
+# Inference-layer benchmark of the micro-batcher without HTTP in the way: `concurrency` callers
+# submit rows back to back, once with batching disabled (batch size 1) and once enabled.
+
+async def run(batcher, rows, concurrency):
+    latencies = []
+    remaining = iter(rows)
+
+    async def caller():
+        for row in remaining:
+            start = time.perf_counter()
+            await batcher.submit(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await batcher.stop()
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return (len(rows) / elapsed, np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 99),
+            batcher.stats()['avg_batch_size'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched vs per-row pipeline inference")
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--concurrency', default='1,32,256')
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch', type=int, default=256)
+    args = parser.parse_args()
+
+    # The API loads its model in the background at server startup; here it is loaded up front
+    main.load_state()
+    rows = [{main.FEATURE_COLUMNS[field]: value for field, value in payload.items()} for payload in car_payloads(args.rows)]
+    print(f"{'concurrency':>11} {'mode':>8} {'rows/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>9}")
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        for mode, batcher in (('per-row', MicroBatcher(main.predict_rows, max_batch_size=1, max_wait_ms=0)),
+                              ('batched', MicroBatcher(main.predict_rows, args.max_batch, args.window_ms))):
+            rps, p50, p99, avg_batch = asyncio.run(run(batcher, rows, concurrency))
+            print(f"{concurrency:>11} {mode:>8} {rps:>9.0f} {p50:>8.1f} {p99:>8.1f} {avg_batch:>9.1f}")
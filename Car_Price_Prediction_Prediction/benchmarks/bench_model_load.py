@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from model_artifact import export_pipeline
+from synthetic import generate_listings
+
+# Cold-start comparison of the pickled pipeline against the pickle-free model artifact.
+# Each load runs in a fresh interpreter. numpy/pandas are imported first (the API needs them anyway);
+# 'load ms' is everything after that, including scikit-learn imports the pickle pulls in.
+# Model names get a numeric suffix to grow the one-hot vocabulary to the requested size.
+
+LOADER = r'''
+import json, sys, time
+sys.path.insert(0, {project_dir!r})
+start = time.perf_counter()
+import numpy, pandas
+import_s = time.perf_counter() - start
+start = time.perf_counter()
+if {fmt!r} == 'pickle':
+    import pickle
+    with open({path!r} + '/model_pipeline.pkl', 'rb') as f:
+        model = pickle.load(f)
+    with open({path!r} + '/metadata.pkl', 'rb') as f:
+        metadata = pickle.load(f)
+else:
+    from model_artifact import load_artifact
+    model = load_artifact({path!r} + '/model_artifact')
+    metadata = model.metadata
+load_s = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    rss_mb = [int(line.split()[1]) / 1024 for line in f if line.startswith('VmRSS:')][0]
+print(json.dumps({{'import_s': import_s, 'load_s': load_s, 'rss_mb': rss_mb}}))
+'''
+
+def build_model(vocab_size, n_rows, path):
+    df = generate_listings(n_rows)
+    rng = np.random.default_rng(0)
+    df['Model'] = df['Model'].astype(str) + '-' + rng.integers(0, vocab_size, n_rows).astype(str)
+    X = df.drop('Price', axis=1)
+    categorical_cols = ['Brand', 'Fuel Type', 'Transmission', 'Condition', 'Model']
+    numerical_cols = ['Year', 'Engine Size', 'Mileage']
+    model_pipeline = Pipeline(steps=[
+        ('preprocessor', ColumnTransformer(transformers=[
+            ('num', StandardScaler(), numerical_cols),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_cols)
+        ])),
+        ('regressor', LinearRegression())
+    ])
+    model_pipeline.fit(X, df['Price'])
+    metadata = {'categorical_cols': categorical_cols, 'numerical_cols': numerical_cols,
+                'models': sorted(X['Model'].astype(str).unique().tolist())}
+
+    with open(os.path.join(path, 'model_pipeline.pkl'), 'wb') as f:
+        pickle.dump(model_pipeline, f)
+    with open(os.path.join(path, 'metadata.pkl'), 'wb') as f:
+        pickle.dump(metadata, f)
+    export_pipeline(model_pipeline, metadata, os.path.join(path, 'model_artifact'))
+
+def measure(fmt, path, repeats):
+    code = LOADER.format(project_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), fmt=fmt, path=path)
+    runs = [json.loads(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                      text=True).stdout.strip().splitlines()[-1]) for _ in range(repeats)]
+    return (min(run['load_s'] for run in runs), min(run['import_s'] + run['load_s'] for run in runs),
+            min(run['rss_mb'] for run in runs))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pickle vs model artifact cold start")
+    parser.add_argument('--vocab', default='50,5000,50000', help="Comma separated Model vocabulary sizes")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'vocab':>8} {'format':>9} {'size KB':>9} {'load ms':>9} {'total ms':>9} {'RSS MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for vocab_size in [int(v) for v in args.vocab.split(',')]:
+            path = os.path.join(tmp, str(vocab_size))
+            os.makedirs(path)
+            build_model(vocab_size, args.rows, path)
+            sizes = {
+                'pickle': sum(os.path.getsize(os.path.join(path, f)) for f in ('model_pipeline.pkl', 'metadata.pkl')),
+                'artifact': sum(os.path.getsize(os.path.join(path, 'model_artifact', f))
+                                for f in os.listdir(os.path.join(path, 'model_artifact')))
+            }
+            for fmt in ('pickle', 'artifact'):
+                load_s, total_s, rss_mb = measure(fmt, path, args.repeats)
+                print(f"{vocab_size:>8} {fmt:>9} {sizes[fmt] / 1024:>9.1f} {load_s * 1000:>9.1f} "
+                      f"{total_s * 1000:>9.1f} {rss_mb:>8.1f}")
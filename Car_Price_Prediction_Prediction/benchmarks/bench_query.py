@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_store import compact_dataset
+from dataset_index import QueryIndex
+from synthetic import generate_listings
+
+# /eda/query latency on synthetic listings: QueryIndex against the equivalent full-table pandas mask.
+
+QUERIES = [
+    ('BMW 5 Series, Used, 2015-2018',
+     {'Brand': ['BMW'], 'Model': ['5 Series'], 'Condition': ['Used']}, {'Year': (2015, 2018)}),
+    ('Tesla, New', {'Brand': ['Tesla'], 'Condition': ['New']}, {}),
+    ('Audi or BMW, 2010-2012, < 50k miles',
+     {'Brand': ['Audi', 'BMW']}, {'Year': (2010, 2012), 'Mileage': (None, 50000)}),
+    ('all listings, 2020+', {}, {'Year': (2020, None)})
+]
+
+# Year bounds outside the data, which must not read into the neighbouring cells' blocks; only
+# cross-checked against pandas, not timed
+OUT_OF_RANGE_QUERIES = [
+    ('BMW 5 Series, 2015-2100', {'Brand': ['BMW'], 'Model': ['5 Series']}, {'Year': (2015, 2100)}),
+    ('BMW 5 Series, 2030-2100', {'Brand': ['BMW'], 'Model': ['5 Series']}, {'Year': (2030, 2100)}),
+    ('BMW 5 Series, 1900-1950', {'Brand': ['BMW'], 'Model': ['5 Series']}, {'Year': (1900, 1950)}),
+    ('Tesla, up to 2100', {'Brand': ['Tesla']}, {'Year': (None, 2100)}),
+    ('all listings, 1900+', {}, {'Year': (1900, None)})
+]
+
+def pandas_query(df, equals, ranges, percentiles):
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in equals.items():
+        mask &= df[col].isin(values).to_numpy()
+    for col, (low, high) in ranges.items():
+        if low is not None:
+            mask &= (df[col] >= low).to_numpy()
+        if high is not None:
+            mask &= (df[col] <= high).to_numpy()
+    prices = df['Price'][mask]
+    return len(prices), prices.mean(), prices.quantile([p / 100 for p in percentiles])
+
+def check_counts(df, index, queries):
+    # The index must agree with the full-table mask on every query
+    for name, equals, ranges in queries:
+        expected = pandas_query(df, equals, ranges, [])[0]
+        actual = index.query(equals, ranges, percentiles=[])['count']
+        if actual != expected:
+            raise AssertionError(f"{name}: index counts {actual} rows, pandas {expected}")
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000.0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the indexed query API against pandas masks")
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    df = compact_dataset(generate_listings(args.rows))
+    start = time.perf_counter()
+    index = QueryIndex(df)
+    print(f"{args.rows} rows, index built in {time.perf_counter() - start:.2f}s ({index.n_cells} cells)")
+    check_counts(df, index, QUERIES + OUT_OF_RANGE_QUERIES)
+    print(f"Counts match pandas on {len(QUERIES) + len(OUT_OF_RANGE_QUERIES)} queries")
+
+    print(f"{'query':<40} {'rows':>9} {'pandas ms':>10} {'count+mean ms':>14} {'+percentiles ms':>16}")
+    for name, equals, ranges in QUERIES:
+        pandas_ms = best_of(lambda: pandas_query(df, equals, ranges, [5, 50, 95]), max(args.repeats // 5, 1))
+        mean_ms = best_of(lambda: index.query(equals, ranges, percentiles=[]), args.repeats)
+        full_ms = best_of(lambda: index.query(equals, ranges, percentiles=[5, 50, 95]), args.repeats)
+        count = index.query(equals, ranges, percentiles=[])['count']
+        print(f"{name:<40} {count:>9} {pandas_ms:>10.2f} {mean_ms:>14.3f} {full_ms:>16.3f}")
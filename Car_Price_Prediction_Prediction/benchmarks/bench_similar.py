@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_store import compact_dataset
+from similar_index import FEATURE_COLS, SimilarIndex
+from synthetic import generate_listings
+
+# Comparable-listings lookup: per-model KD-trees against a brute-force scan of the same brand/model.
+
+def brute_force(df, features, mean, scale, brand, model, point, k):
+    rows = np.flatnonzero(((df['Brand'] == brand) & (df['Model'] == model)).to_numpy())
+    distances = np.sqrt((((features[rows] - mean) / scale - (point - mean) / scale) ** 2).sum(axis=1))
+    nearest = np.argsort(distances)[:k]
+    return rows[nearest], distances[nearest]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the /similar index against brute force")
+    parser.add_argument('--rows', default='100000,1000000,10000000', help="Comma separated dataset sizes")
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'build s':>8} {'index ms':>9} {'brute ms':>9}")
+    for n_rows in [int(n) for n in args.rows.split(',')]:
+        df = compact_dataset(generate_listings(n_rows))
+        start = time.perf_counter()
+        index = SimilarIndex(df)
+        build_s = time.perf_counter() - start
+
+        queries = generate_listings(args.queries, seed=7)
+        points = queries[FEATURE_COLS].to_numpy(dtype=np.float64)
+        targets = list(zip(queries['Brand'].astype(str), queries['Model'].astype(str)))
+
+        start = time.perf_counter()
+        for (brand, model), point in zip(targets, points):
+            index.query(brand, model, point, args.k)
+        index_ms = (time.perf_counter() - start) / args.queries * 1000.0
+
+        features = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+        n_brute = max(args.queries // 10, 1)
+        start = time.perf_counter()
+        for (brand, model), point in list(zip(targets, points))[:n_brute]:
+            brute_force(df, features, index.mean, index.scale, brand, model, point, args.k)
+        brute_ms = (time.perf_counter() - start) / n_brute * 1000.0
+        print(f"{n_rows:>10} {build_s:>8.2f} {index_ms:>9.3f} {brute_ms:>9.2f}")
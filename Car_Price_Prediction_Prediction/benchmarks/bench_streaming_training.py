@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_store import save_dataset
+from synthetic import generate_listings
+
+# Peak memory and time of in-memory training (read_table + sklearn pipeline fit) against the
+# streaming path (chunked IncrementalStats), each in a fresh interpreter on the same columnar file.
+# Peak RSS includes the file-backed pages of the memory-mapped dataset, which the OS can reclaim;
+# 'anon MB' is the process' private memory at the end of training.
+
+TRAINER = r'''
+import json, sys, time
+sys.path.insert(0, {project_dir!r})
+import numpy as np
+start = time.perf_counter()
+if {mode!r} == 'in-memory':
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+    from data_store import read_table
+    from incremental_stats import CATEGORICAL_COLS, NUMERICAL_COLS
+    from model_search import build_preprocessor
+    df = read_table({path!r})
+    Pipeline([('preprocessor', build_preprocessor(NUMERICAL_COLS, CATEGORICAL_COLS)),
+              ('regressor', LinearRegression())]).fit(df.drop('Price', axis=1), df['Price'])
+else:
+    from data_store import iter_table
+    from incremental_stats import IncrementalStats
+    stats = IncrementalStats()
+    for chunk in iter_table({path!r}, {chunksize}):
+        stats.ingest(chunk)
+    stats.solve()
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    status = {{line.split(':')[0]: int(line.split()[1]) / 1024 for line in f if line.startswith(('VmHWM:', 'RssAnon:'))}}
+print(json.dumps({{'train_s': elapsed, 'peak_rss_mb': status['VmHWM'], 'anon_mb': status['RssAnon']}}))
+'''
+
+def measure(mode, path, chunksize):
+    code = TRAINER.format(project_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          mode=mode, path=path, chunksize=chunksize)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark in-memory vs streaming training")
+    parser.add_argument('--rows', default='100000,1000000,4000000', help="Comma separated dataset sizes")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--max-in-memory-rows', type=int, default=4000000,
+                        help="Skip the in-memory fit above this size")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'mode':>10} {'train s':>9} {'peak MB':>9} {'anon MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in [int(n) for n in args.rows.split(',')]:
+            path = os.path.join(tmp, f"listings_{n_rows}.cols")
+            save_dataset(generate_listings(n_rows), path)
+            for mode in ('in-memory', 'streaming'):
+                if mode == 'in-memory' and n_rows > args.max_in_memory_rows:
+                    continue
+                result = measure(mode, path, args.chunksize)
+                print(f"{n_rows:>10} {mode:>10} {result['train_s']:>9.2f} {result['peak_rss_mb']:>9.1f} {result['anon_mb']:>9.1f}")
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import generate_listings
+
+# Closed-loop load generator: `concurrency` clients each send requests back to back
+# until `requests` have completed, recording per-request latency.
+
+def car_payloads(n, seed=0):
+    df = generate_listings(n, seed=seed)
+    return [{
+        'Brand': row['Brand'],
+        'Year': int(row['Year']),
+        'Engine_Size': float(row['Engine Size']),
+        'Fuel_Type': row['Fuel Type'],
+        'Transmission': row['Transmission'],
+        'Mileage': float(row['Mileage']),
+        'Condition': row['Condition'],
+        'Model': row['Model']
+    } for row in df.to_dict(orient='records')]
+
+def summarize(latencies, elapsed, errors):
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        'p90_ms': float(np.percentile(latencies_ms, 90)) if len(latencies) else None,
+        'p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+        'max_ms': float(latencies_ms.max()) if len(latencies) else None
+    }
+
+async def run_load(base_url, method, path, payloads=None, concurrency=32, requests=2000, warmup=50):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def send(i):
+            kwargs = {'json': payloads[i % len(payloads)]} if payloads else {}
+            return await client.request(method, path, **kwargs)
+
+        for i in range(warmup):
+            await send(i)
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    # Offset past the warmup payloads, so measured requests are not cache hits
+                    response = await send(warmup + i)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test an endpoint of a running API instance")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--method', default='POST')
+    parser.add_argument('--path', default='/predict')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50)
+    args = parser.parse_args()
+
+    # One distinct payload per request, so no measured request repeats an earlier one
+    payloads = car_payloads(args.requests + args.warmup) if args.method.upper() == 'POST' else None
+    result = asyncio.run(run_load(args.url, args.method.upper(), args.path, payloads, args.concurrency,
+                                  args.requests, args.warmup))
+    print(json.dumps(result, indent=1))
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_store import save_dataset
+from load_test import car_payloads, run_load
+from synthetic import generate_listings
+
+# Reproducible end-to-end benchmark: builds a workspace of synthetic listings (priced with the
+# optimize_data logic), times train_and_save_model with its peak memory in a fresh interpreter per
+# dataset size, then starts uvicorn on the trained model and measures throughput and latency
+# percentiles of the main endpoints. Each run is stored as JSON under benchmarks/results/, and
+# --compare prints the relative change between two stored runs.
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+DATA_FILE = 'cleaned_car_price_data_logical.cols'
+
+# name: (method, path, payload kind)
+ENDPOINTS = {
+    'predict': ('POST', '/predict', 'car'),
+    'predict_batch_100': ('POST', '/predict/batch', 'batch'),
+    'similar': ('POST', '/similar?k=5', 'car'),
+    'eda_stats': ('GET', '/eda/stats', None),
+    'eda_sample': ('GET', '/eda/sample?n=100', None),
+    'eda_query': ('GET', '/eda/query?brand=BMW&year_min=2015', None),
+    'health': ('GET', '/health', None)
+}
+BATCH_ROWS = 100
+
+TRAINER = r'''
+import json, os, sys, time
+sys.path.insert(0, {project_dir!r})
+os.chdir({workdir!r})
+start = time.perf_counter()
+from model_utils import train_and_save_model
+train_and_save_model({data_file!r}, 'model_pipeline.pkl', 'preprocessor.pkl')
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    peak = [int(line.split()[1]) / 1024 for line in f if line.startswith('VmHWM:')][0]
+print(json.dumps({{'train_s': elapsed, 'peak_rss_mb': peak}}))
+'''
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure_training(workdir, n_rows, seed):
+    save_dataset(generate_listings(n_rows, seed=seed), os.path.join(workdir, DATA_FILE))
+    code = TRAINER.format(project_dir=PROJECT_DIR, workdir=workdir, data_file=DATA_FILE)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return {'rows': n_rows, **json.loads(out.strip().splitlines()[-1])}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(workdir, port, timeout=300.0):
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+                               '--log-level', 'warning'], cwd=workdir, env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        # Model, data and indexes load in the background, so wait for /ready rather than /health; trees
+        # without /ready (404) load everything before answering /health
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0)
+            if response.status_code == 200 or response.status_code == 404:
+                return server
+            if response.json().get('state') == 'failed':
+                server.terminate()
+                raise RuntimeError(f"API failed to load: {response.json().get('errors')}")
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API did not become ready in time")
+
+def measure_endpoints(base_url, names, requests, concurrency, warmup):
+    # Distinct cars for every request, so /predict measures the model rather than the prediction cache
+    cars = car_payloads(requests + warmup, seed=1)
+    payloads = {
+        'car': cars,
+        'batch': [cars[i:i + BATCH_ROWS] for i in range(0, len(cars), BATCH_ROWS)],
+        None: None
+    }
+    results = {}
+    for name in names:
+        method, path, kind = ENDPOINTS[name]
+        results[name] = asyncio.run(run_load(base_url, method, path, payloads[kind], concurrency, requests, warmup))
+        print(f"{name:>18} {results[name]['throughput_rps']:>9.1f} rps  p50 {results[name]['p50_ms']:>8.2f} ms  "
+              f"p99 {results[name]['p99_ms']:>8.2f} ms  errors {results[name]['errors']}")
+    return results
+
+def run_suite(args):
+    result = {
+        'label': args.label,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'config': {'train_rows': args.train_rows, 'serve_rows': args.serve_rows, 'requests': args.requests,
+                   'concurrency': args.concurrency, 'seed': args.seed},
+        'training': [],
+        'endpoints': {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'rows':>10} {'train s':>9} {'peak MB':>9}")
+        for n_rows in [int(n) for n in args.train_rows.split(',')]:
+            training = measure_training(workdir, n_rows, args.seed)
+            result['training'].append(training)
+            print(f"{n_rows:>10} {training['train_s']:>9.2f} {training['peak_rss_mb']:>9.1f}")
+
+        # The server runs on the model (and data) of the serving size
+        measure_training(workdir, args.serve_rows, args.seed)
+        port = free_port()
+        server = start_server(workdir, port)
+        try:
+            names = args.endpoints.split(',') if args.endpoints else list(ENDPOINTS)
+            result['endpoints'] = measure_endpoints(f"http://127.0.0.1:{port}", names, args.requests,
+                                                    args.concurrency, args.warmup)
+        finally:
+            server.terminate()
+            server.wait()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit'] or 'nogit'}"
+                                         f"{'-' + args.label if args.label else ''}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=1)
+    print(f"Results saved to {path}")
+    return path
+
+def compare(baseline_path, candidate_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    def row(name, old, new, higher_is_better=False):
+        if old is None or new is None:
+            return
+        change = (new - old) / old * 100.0 if old else 0.0
+        better = change > 0 if higher_is_better else change < 0
+        print(f"{name:<40} {old:>12.2f} {new:>12.2f} {change:>+8.1f}% {'better' if better else ''}")
+
+    print(f"{'metric':<40} {baseline.get('commit') or 'baseline':>12} {candidate.get('commit') or 'candidate':>12}")
+    old_training = {entry['rows']: entry for entry in baseline['training']}
+    for entry in candidate['training']:
+        if entry['rows'] in old_training:
+            row(f"train {entry['rows']} rows (s)", old_training[entry['rows']]['train_s'], entry['train_s'])
+            row(f"train {entry['rows']} rows peak (MB)", old_training[entry['rows']]['peak_rss_mb'], entry['peak_rss_mb'])
+    for name, new in candidate['endpoints'].items():
+        old = baseline['endpoints'].get(name)
+        if old is not None:
+            row(f"{name} throughput (rps)", old['throughput_rps'], new['throughput_rps'], higher_is_better=True)
+            row(f"{name} p99 (ms)", old['p99_ms'], new['p99_ms'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark training and the API, or compare two stored runs")
+    parser.add_argument('--train-rows', default='10000,100000,1000000', help="Comma separated training set sizes")
+    parser.add_argument('--serve-rows', type=int, default=100000, help="Dataset size behind the API")
+    parser.add_argument('--endpoints', default=None, help=f"Comma separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="Compare two stored result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run_suite(args)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cleaning import logical_price
+
+# Brand -> models as they appear in the real dataset
+BRAND_MODELS = {
+    'Audi': ['A3', 'A4', 'Q5', 'Q7'],
+    'BMW': ['3 Series', '5 Series', 'X3', 'X5'],
+    'Ford': ['Explorer', 'Fiesta', 'Focus', 'Mustang'],
+    'Honda': ['Accord', 'CR-V', 'Civic', 'Fit'],
+    'Mercedes': ['C-Class', 'E-Class', 'GLA', 'GLC'],
+    'Tesla': ['Model 3', 'Model S', 'Model X', 'Model Y'],
+    'Toyota': ['Camry', 'Corolla', 'Prius', 'RAV4']
+}
+FUEL_TYPES = ['Diesel', 'Electric', 'Hybrid', 'Petrol']
+TRANSMISSIONS = ['Automatic', 'Manual']
+CONDITIONS = ['Like New', 'New', 'Used']
+
+def generate_listings(n_rows, seed=42):
+    # Synthetic cleaned listings with the same schema and value ranges as the real data,
+    # priced with the same logic as optimize_data
+    # (string columns are built as categoricals so millions of rows fit comfortably in memory)
+    rng = np.random.default_rng(seed)
+    brands = list(BRAND_MODELS)
+    models = [model for brand in brands for model in BRAND_MODELS[brand]]
+    brand_idx = rng.integers(0, len(brands), n_rows)
+    model_idx = brand_idx * 4 + rng.integers(0, 4, n_rows)
+
+    def categorical(codes, categories):
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    df = pd.DataFrame({
+        'Brand': categorical(brand_idx, brands),
+        'Year': rng.integers(2000, 2024, n_rows),
+        'Engine Size': np.round(rng.uniform(1.0, 6.0, n_rows), 1),
+        'Fuel Type': categorical(rng.integers(0, len(FUEL_TYPES), n_rows), FUEL_TYPES),
+        'Transmission': categorical(rng.integers(0, len(TRANSMISSIONS), n_rows), TRANSMISSIONS),
+        'Mileage': rng.integers(0, 300000, n_rows),
+        'Condition': categorical(rng.integers(0, len(CONDITIONS), n_rows), CONDITIONS),
+        'Model': categorical(model_idx, models)
+    })
+    np.random.seed(seed)
+    df.insert(7, 'Price', logical_price(df))
+    return df
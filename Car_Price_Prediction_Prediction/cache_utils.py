@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class LRUCache:
+    # Thread-safe LRU cache bounded by entry count and, optionally, by total size in bytes.
+    # Entries can also expire after ttl seconds. Hit/miss/eviction counters are kept for monitoring.
+
+    def __init__(self, max_entries=128, max_bytes=None, ttl=None, sizeof=len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self.total_bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return value
+
+    def get_or_set(self, key, compute):
+        # compute() runs outside the lock; concurrent misses for the same key may both compute
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.set(key, compute())
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,156 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_store import iter_table, save_dataset
+
+# Importable cleaning pipeline shared by prepare_data and optimize_data.
+#
+# Every step is a vectorized column operation applied chunk by chunk:
+#   1. drop identifier columns, rows with missing values, and cast strings to categoricals
+#   2. drop duplicate listings (first occurrence wins, across chunks, via 64-bit row hashes)
+#   3. optionally synthesize the logical Price, then clip values to their valid ranges
+#   4. drop rows outside mean +/- `outlier_sigma` standard deviations (as in the notebook's
+#      outlier section), with the moments accumulated over all chunks
+# Files are independent datasets, so clean_files() runs one worker process per file.
+
+DROP_COLS = ['Car ID']
+CATEGORICAL_COLS = ['Brand', 'Fuel Type', 'Transmission', 'Condition', 'Model']
+# (lower, upper) bounds; None leaves that side open
+CLIP_BOUNDS = {
+    'Mileage': (0, None),
+    'Engine Size': (0, None),
+    'Price': (1000, None)
+}
+OUTLIER_COLS = ['Price', 'Mileage']
+
+# Logical price components (see logical_price)
+BASE_PRICE = 30000
+CONDITION_BONUS = {'New': 8000, 'Like New': 4000}
+BRAND_BONUS = {'Mercedes': 5000, 'Tesla': 6000}
+PRICE_NOISE_SIGMA = 5000
+
+def logical_price(df, rng=None):
+    # Let's create a 'Logical Price' based on real car valuation logic
+    # Base Price around 30k
+    # + $1500 for every year after 2000
+    # + $8000 if Condition is 'New', $4000 if 'Like New'
+    # - $0.1 for every mile driven
+    # + $3000 per litre of Engine Size
+    # + brand premiums for Mercedes and Tesla
+    price = (BASE_PRICE + (df['Year'].to_numpy(dtype=np.float64) - 2000) * 1500
+             + df['Engine Size'].to_numpy(dtype=np.float64) * 3000
+             - df['Mileage'].to_numpy(dtype=np.float64) * 0.1)
+    for col, bonuses in (('Condition', CONDITION_BONUS), ('Brand', BRAND_BONUS)):
+        for value, bonus in bonuses.items():
+            price += np.where((df[col] == value).to_numpy(), bonus, 0)
+
+    # Gaussian noise (sigma 5000) keeps R-squared realistic; rng=None draws from np.random
+    price += (rng if rng is not None else np.random).normal(0, PRICE_NOISE_SIGMA, len(df))
+
+    # Ensure no negative prices
+    return pd.Series(np.maximum(price, CLIP_BOUNDS['Price'][0]), index=df.index, name='Price')
+
+def prepare_chunk(chunk):
+    chunk = chunk.drop(columns=[col for col in DROP_COLS if col in chunk.columns])
+    chunk = chunk.dropna()
+    return chunk.astype({col: 'category' for col in CATEGORICAL_COLS if col in chunk.columns})
+
+def clip_chunk(chunk, bounds=CLIP_BOUNDS):
+    for col, (lower, upper) in bounds.items():
+        if col in chunk.columns:
+            chunk[col] = np.clip(chunk[col].to_numpy(), lower, upper)
+    return chunk
+
+def _concat(chunks):
+    # pd.concat turns categoricals with differing categories into object; union them instead
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            df[col] = pd.api.types.union_categoricals([chunk[col] for chunk in chunks], ignore_order=True)
+    return df
+
+def clean_chunks(chunks, synthesize_price=False, outlier_sigma=3.0, seed=None):
+    # Pass 1: per-chunk preparation and row hashes for global deduplication
+    prepared = []
+    hashes = []
+    for chunk in chunks:
+        chunk = prepare_chunk(chunk)
+        prepared.append(chunk)
+        hashes.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+    _, first = np.unique(np.concatenate(hashes) if hashes else np.zeros(0, np.uint64), return_index=True)
+    keep = np.zeros(sum(len(h) for h in hashes), dtype=bool)
+    keep[first] = True
+
+    # Pass 2: dedupe, price synthesis (one seeded stream per chunk), clipping, outlier moments
+    moments = {col: np.zeros(3) for col in OUTLIER_COLS}
+    offset = 0
+    for i, chunk in enumerate(prepared):
+        n_rows = len(chunk)
+        chunk = chunk[keep[offset:offset + n_rows]].copy()
+        offset += n_rows
+        if synthesize_price:
+            rng = np.random.default_rng([seed, i]) if seed is not None else None
+            chunk['Price'] = logical_price(chunk, rng)
+        chunk = clip_chunk(chunk)
+        for col in moments:
+            if col in chunk.columns:
+                values = chunk[col].to_numpy(dtype=np.float64)
+                moments[col] += (len(values), values.sum(), values @ values)
+        prepared[i] = chunk
+
+    # Pass 3: 3-sigma filter with bounds from the whole dataset (sample std, like pandas)
+    if outlier_sigma is not None:
+        bounds = {}
+        for col, (n, total, total_sq) in moments.items():
+            if n > 1:
+                mean = total / n
+                std = np.sqrt(max((total_sq - n * mean * mean) / (n - 1), 0.0))
+                bounds[col] = (mean - outlier_sigma * std, mean + outlier_sigma * std)
+        for i, chunk in enumerate(prepared):
+            mask = np.ones(len(chunk), dtype=bool)
+            for col, (lower, upper) in bounds.items():
+                values = chunk[col].to_numpy()
+                mask &= (values >= lower) & (values <= upper)
+            prepared[i] = chunk[mask]
+    return _concat(prepared)
+
+def clean_frame(df, chunksize=1000000, **kwargs):
+    return clean_chunks((df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)), **kwargs)
+
+def clean_table(path, chunksize=1000000, **kwargs):
+    return clean_chunks(iter_table(path, chunksize), **kwargs)
+
+def clean_file(input_path, output_path, chunksize=1000000, **kwargs):
+    df = clean_table(input_path, chunksize, **kwargs)
+    save_dataset(df, output_path)
+    return output_path, len(df)
+
+def clean_files(input_paths, output_paths, workers=None, **kwargs):
+    # Each file is cleaned independently in its own worker process
+    with ProcessPoolExecutor(max_workers=workers or min(len(input_paths), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(clean_file, input_path, output_path, **kwargs)
+                   for input_path, output_path in zip(input_paths, output_paths)]
+        return [future.result() for future in futures]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean raw listing files into columnar datasets")
+    parser.add_argument('inputs', nargs='+', help="CSV files or columnar datasets")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--synthesize-price', action='store_true')
+    parser.add_argument('--sigma', type=float, default=3.0, help="Outlier threshold in standard deviations (0 disables)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    outputs = [os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '.cols') for path in args.inputs]
+    for output_path, n_rows in clean_files(args.inputs, outputs, args.workers, chunksize=args.chunksize,
+                                           synthesize_price=args.synthesize_price,
+                                           outlier_sigma=args.sigma or None, seed=args.seed):
+        print(f"{output_path}: {n_rows} rows")
@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Typed columnar storage for the cleaned dataset: one .npy file per column plus a schema.json.
+# String columns are stored as integer codes with their category list, numeric columns in their
+# own dtype, so loading is a memory map instead of re-parsing and re-inferring a CSV.
+# CSV is only used to import raw data and to export results for the notebook.
+
+SCHEMA_FILE = 'schema.json'
+# Key -> .npy file of the arrays stored by load_or_build_arrays
+ARRAYS_FILE = 'arrays.json'
+
+# Narrow dtypes for serving: the API only reads the data, so float32/int16 precision is plenty
+COMPACT_DTYPES = {
+    'Year': np.int16,
+    'Engine Size': np.float32,
+    'Mileage': np.float32,
+    'Price': np.float32
+}
+
+def _codes_dtype(n_categories):
+    if n_categories < 2 ** 7:
+        return np.int8
+    if n_categories < 2 ** 15:
+        return np.int16
+    return np.int32
+
+def save_dataset(df, path, source=None):
+    # Written to a temporary directory and swapped in, so readers never see a half-written dataset
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    schema = {'n_rows': int(len(df)), 'columns': []}
+    if source is not None:
+        schema['source'] = source
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        file_name = f"col_{i}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series):
+            categorical = series.astype('category')
+            categories = [str(c) for c in categorical.cat.categories]
+            codes = categorical.cat.codes.to_numpy().astype(_codes_dtype(len(categories)))
+            np.save(os.path.join(tmp_path, file_name), codes)
+            schema['columns'].append({'name': col, 'kind': 'category', 'file': file_name, 'categories': categories})
+        else:
+            values = series.to_numpy()
+            np.save(os.path.join(tmp_path, file_name), values)
+            schema['columns'].append({'name': col, 'kind': 'numeric', 'file': file_name, 'dtype': values.dtype.str})
+
+    # Schema is written last; its presence marks a complete dataset
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+def load_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+def load_dataset(path, columns=None, mmap=True):
+    schema = load_schema(path)
+    mmap_mode = 'r' if mmap else None
+    data = {}
+    for column in schema['columns']:
+        if columns is not None and column['name'] not in columns:
+            continue
+        values = np.load(os.path.join(path, column['file']), mmap_mode=mmap_mode, allow_pickle=False)
+        if column['kind'] == 'category':
+            # validate=False keeps the codes as the memory map (validating copies them); they were
+            # written by save_dataset from pandas' own codes, so they are in range by construction
+            data[column['name']] = pd.Series(pd.Categorical.from_codes(values, categories=column['categories'],
+                                                                       validate=False), copy=False)
+        else:
+            # Wrapping in a Series keeps pandas from consolidating (and copying) the memory map
+            data[column['name']] = pd.Series(values, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+def compact_dataset(df, dtypes=COMPACT_DTYPES):
+    # Categorical codes for string columns and downcast numerics
+    df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def _source_key(path):
+    stat = os.stat(os.path.join(path, SCHEMA_FILE))
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+def ensure_compact_copy(path, compact_path):
+    # Writes a compact copy of a columnar dataset next to it, unless an up to date one already exists
+    source = _source_key(path)
+    try:
+        if load_schema(compact_path).get('source') == source:
+            return compact_path
+    except (OSError, ValueError):
+        pass
+    save_dataset(compact_dataset(load_dataset(path, mmap=False)), compact_path, source=source)
+    return compact_path
+
+def load_serving_dataset(path, compact_path, shared=True):
+    # With shared=True every worker memory-maps the same read-only compact copy, so the OS keeps
+    # a single copy of the data in the page cache instead of one private DataFrame per worker
+    if shared and os.path.exists(os.path.join(path, SCHEMA_FILE)):
+        try:
+            df = load_dataset(ensure_compact_copy(path, compact_path), mmap=True)
+            # Where indexes over this frame can be stored and shared (see load_or_build_arrays)
+            df.attrs['dataset_path'] = compact_path
+            return df
+        except OSError as e:
+            print(f"Could not share {compact_path}, loading a private copy: {e}")
+    return compact_dataset(read_table(path))
+
+def load_or_build_arrays(dataset_path, name, build):
+    # Arrays derived from a read-only columnar dataset (its indexes), stored in
+    # <dataset_path>/<name>.arrays/ and memory-mapped, so all workers share the copy written by
+    # whichever worker built it first. Rewriting the dataset replaces its directory, which drops them
+    path = os.path.join(dataset_path, f"{name}.arrays")
+    if not os.path.exists(os.path.join(path, ARRAYS_FILE)):
+        arrays = build()
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        files = {}
+        for i, (key, values) in enumerate(arrays.items()):
+            files[key] = f"{i}.npy"
+            np.save(os.path.join(tmp_path, files[key]), np.asarray(values), allow_pickle=False)
+        with open(os.path.join(tmp_path, ARRAYS_FILE), 'w') as f:
+            json.dump(files, f, indent=1)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another worker stored them first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    with open(os.path.join(path, ARRAYS_FILE)) as f:
+        files = json.load(f)
+    return {key: np.load(os.path.join(path, file_name), mmap_mode='r', allow_pickle=False)
+            for key, file_name in files.items()}
+
+def is_memory_mapped(values):
+    base = values
+    while getattr(base, 'base', None) is not None and not isinstance(base, np.memmap):
+        base = base.base
+    return isinstance(base, np.memmap)
+
+def arrays_footprint(arrays):
+    # (memory-mapped bytes, private bytes) of numpy arrays
+    shared_bytes = 0
+    private_bytes = 0
+    for values in arrays:
+        if is_memory_mapped(values):
+            shared_bytes += values.nbytes
+        else:
+            private_bytes += values.nbytes
+    return shared_bytes, private_bytes
+
+def memory_report(df, indexes=None):
+    # Dataset footprint split into memory-mapped (shareable between workers) and private bytes,
+    # plus this process' resident memory from /proc
+    shared_bytes = 0
+    private_bytes = 0
+    for col in df.columns:
+        values = df[col].cat.codes.to_numpy() if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].to_numpy()
+        nbytes = df[col].memory_usage(deep=True, index=False)
+        if is_memory_mapped(values):
+            shared_bytes += nbytes
+        else:
+            private_bytes += nbytes
+
+    report = {
+        'rows': int(len(df)),
+        'dataset_shared_mb': round(shared_bytes / 2 ** 20, 3),
+        'dataset_private_mb': round(private_bytes / 2 ** 20, 3),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
+    }
+    # indexes: {name: (shared bytes, private bytes)}, built per worker unless stored with the dataset
+    for name, (shared, private) in (indexes or {}).items():
+        report[f"{name}_shared_mb"] = round(shared / 2 ** 20, 3)
+        report[f"{name}_private_mb"] = round(private / 2 ** 20, 3)
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in ('VmRSS', 'VmHWM', 'RssAnon', 'RssFile'):
+                    report[f"process_{field.lower()}_mb"] = round(int(value.split()[0]) / 1024, 3)
+    except OSError:
+        pass
+    return report
+
+def table_source(path):
+    # The file read_table/iter_table actually read: the columnar dataset, or the CSV it was imported
+    # from while the dataset directory does not exist yet
+    if path.endswith('.csv') or os.path.exists(os.path.join(path, SCHEMA_FILE)):
+        return path
+    csv_path = (path[:-len('.cols')] if path.endswith('.cols') else path) + '.csv'
+    return csv_path if os.path.exists(csv_path) else path
+
+def read_table(path, **kwargs):
+    # Accepts either a columnar dataset directory or a CSV file (the import path)
+    source = table_source(path)
+    if source.endswith('.csv'):
+        if source != path:
+            print(f"Columnar dataset {path} not found, importing {source}")
+        return pd.read_csv(source)
+    return load_dataset(path, **kwargs)
+
+def iter_table(path, chunksize=100000, columns=None):
+    # Streams a CSV or columnar dataset in row chunks; columnar chunks are slices of the memory map,
+    # so only the chunk being processed is paged in
+    source = table_source(path)
+    if source.endswith('.csv'):
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+        return
+    df = load_dataset(path, columns=columns, mmap=True)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+if __name__ == "__main__":
+    # python data_store.py import data.csv data.cols | python data_store.py export data.cols data.csv
+    if len(sys.argv) != 4 or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python data_store.py import|export <source> <destination>")
+        sys.exit(1)
+
+    command, source, destination = sys.argv[1:]
+    if command == 'import':
+        save_dataset(pd.read_csv(source), destination)
+    else:
+        load_dataset(source).to_csv(destination, index=False)
+    print(f"{source} -> {destination}")
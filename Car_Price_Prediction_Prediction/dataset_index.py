@@ -0,0 +1,299 @@
+import numpy as np
+import pandas as pd
+
+# Precomputed per-column indexes over the (read-only) serving dataset.
+#
+# Categorical columns get an inverted index: the row ids of every category, ascending, stored as one
+# array plus offsets (CSR style). Numeric columns get a sorted index: the stable argsort of the
+# column and the sorted values, so a range is two binary searches. Both are built once at startup;
+# for the shared serving copy, for_dataset() stores the arrays with the dataset and memory-maps them,
+# so workers share one copy instead of each holding its own.
+
+SCAN_BLOCK_ROWS = 65536
+# A numeric range is used as the candidate list (sorted by row id) only up to this many rows;
+# larger ranges are cheaper to check block by block while scanning
+MAX_RANGE_CANDIDATES = 1000000
+
+def row_dtype(n_rows):
+    return np.int32 if n_rows < 2 ** 31 else np.int64
+
+class DatasetIndex:
+    def __init__(self, df, arrays=None):
+        self.df = df
+        self.n_rows = len(df)
+        self.row_dtype = row_dtype(self.n_rows)
+        self.arrays = arrays if arrays is not None else self.build_arrays(df)
+        # {col: (categories, row_ids, offsets)}
+        self.inverted = {}
+        # {col: (order, sorted_values)}
+        self.sorted = {}
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                self.inverted[col] = (df[col].cat.categories, self.arrays[f"{col}.order"], self.arrays[f"{col}.offsets"])
+            elif pd.api.types.is_numeric_dtype(df[col]):
+                self.sorted[col] = (self.arrays[f"{col}.order"], self.arrays[f"{col}.sorted"])
+
+    @staticmethod
+    def build_arrays(df):
+        arrays = {}
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes = df[col].cat.codes.to_numpy()
+                order = np.argsort(codes, kind='stable').astype(row_dtype(len(df)))
+                arrays[f"{col}.order"] = order
+                arrays[f"{col}.offsets"] = np.searchsorted(codes[order], np.arange(len(df[col].cat.categories) + 1))
+            elif pd.api.types.is_numeric_dtype(df[col]):
+                values = df[col].to_numpy()
+                order = np.argsort(values, kind='stable').astype(row_dtype(len(df)))
+                arrays[f"{col}.order"] = order
+                arrays[f"{col}.sorted"] = values[order]
+        return arrays
+
+    @classmethod
+    def for_dataset(cls, df):
+        # Shares the arrays stored with the dataset the frame was memory-mapped from, if any
+        dataset_path = df.attrs.get('dataset_path')
+        if dataset_path is None:
+            return cls(df)
+        from data_store import load_or_build_arrays
+        return cls(df, load_or_build_arrays(dataset_path, 'dataset_index', lambda: cls.build_arrays(df)))
+
+    def footprint(self):
+        from data_store import arrays_footprint
+        return arrays_footprint(self.arrays.values())
+
+    def category_rows(self, col, value):
+        # Ascending row ids where col == value (empty for unknown values)
+        categories, row_ids, offsets = self.inverted[col]
+        code = categories.get_indexer([value])[0]
+        if code < 0:
+            return row_ids[:0]
+        return row_ids[offsets[code]:offsets[code + 1]]
+
+    def range_bounds(self, col, low=None, high=None):
+        # Positions [start, stop) in the sorted index with low <= value <= high
+        _, sorted_values = self.sorted[col]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return start, max(start, stop)
+
+    def block_mask(self, rows, equals, ranges):
+        # Vectorized check of all filters on a block of row ids
+        mask = np.ones(len(rows), dtype=bool)
+        for col, value in equals.items():
+            categories = self.inverted[col][0]
+            code = categories.get_indexer([value])[0]
+            mask &= self.df[col].cat.codes.to_numpy()[rows] == code
+        for col, (low, high) in ranges.items():
+            values = self.df[col].to_numpy()[rows]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        return mask
+
+    def candidates(self, equals, ranges):
+        # Smallest ascending candidate list among the indexed filters, or None to scan all rows
+        best = None
+        for col, value in equals.items():
+            rows = self.category_rows(col, value)
+            if best is None or len(rows) < len(best):
+                best = rows
+        for col, (low, high) in ranges.items():
+            start, stop = self.range_bounds(col, low, high)
+            if stop - start <= MAX_RANGE_CANDIDATES and (best is None or stop - start < len(best)):
+                best = np.sort(self.sorted[col][0][start:stop])
+        return best
+
+    def iter_matches(self, equals=None, ranges=None, after=-1, block_rows=SCAN_BLOCK_ROWS):
+        # Yields ascending arrays of matching row ids greater than `after`, one block at a time,
+        # so a caller paging through millions of rows holds at most one block in memory
+        equals = equals or {}
+        ranges = {col: bounds for col, bounds in (ranges or {}).items() if bounds != (None, None)}
+        candidates = self.candidates(equals, ranges)
+        if candidates is None:
+            for start in range(after + 1, self.n_rows, block_rows):
+                rows = np.arange(start, min(start + block_rows, self.n_rows), dtype=self.row_dtype)
+                matches = rows[self.block_mask(rows, equals, ranges)]
+                if len(matches):
+                    yield matches
+            return
+        for start in range(np.searchsorted(candidates, after, side='right'), len(candidates), block_rows):
+            rows = candidates[start:start + block_rows]
+            matches = rows[self.block_mask(rows, equals, ranges)]
+            if len(matches):
+                yield matches
+
+    def take(self, limit, equals=None, ranges=None, after=-1):
+        # Up to `limit` ascending matching row ids after `after`
+        taken = []
+        remaining = limit
+        for matches in self.iter_matches(equals, ranges, after):
+            taken.append(matches[:remaining])
+            remaining -= len(taken[-1])
+            if remaining <= 0:
+                break
+        return np.concatenate(taken) if taken else np.zeros(0, dtype=self.row_dtype)
+
+# Query index for filtered aggregates (/eda/query).
+#
+# Rows are grouped into cells, one per distinct combination of the categorical columns (a few
+# hundred), and the dataset is stored permuted by (cell, Year), so every cell is a contiguous block
+# sorted by year. Each (column, category) maps to a bitmap over cells; categorical filters are a
+# bitmap intersection over cells instead of rows, and a year range is one vectorized binary search
+# per selected cell. Counts and means come from prefix sums without touching the rows; only
+# percentiles and filters on other numeric columns read the selected rows.
+
+CLUSTER_COL = 'Year'
+METRIC_COLS = ['Price', 'Mileage', 'Engine Size']
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+class QueryIndex:
+    def __init__(self, df, arrays=None):
+        self.categorical_cols, self.numeric_cols = self.columns(df)
+        self.categories = {col: df[col].cat.categories for col in self.categorical_cols}
+        self.arrays = arrays if arrays is not None else self.build_arrays(df)
+        self.n_cells, self.cluster_min, self.cluster_span = (int(v) for v in self.arrays['shape'])
+        # {col: bool array [n_categories, n_cells]}: cells containing each category
+        self.cell_bitmaps = {col: self.arrays[f"{col}.cells"] for col in self.categorical_cols}
+        # Sorted composite key cell * span + (year - min): cell blocks, each sorted by year
+        self.key = self.arrays['key']
+        self.values = {col: self.arrays[f"{col}.values"] for col in self.numeric_cols}
+        # prefix[i] = sum of the first i values, so any contiguous block sums in O(1)
+        self.prefix = {col: self.arrays[f"{col}.prefix"] for col in METRIC_COLS if col in self.values}
+
+    @staticmethod
+    def columns(df):
+        categorical_cols = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+        numeric_cols = [col for col in df.columns if col not in categorical_cols
+                        and pd.api.types.is_numeric_dtype(df[col])]
+        return categorical_cols, numeric_cols
+
+    @classmethod
+    def for_dataset(cls, df):
+        # Shares the arrays stored with the dataset the frame was memory-mapped from, if any
+        dataset_path = df.attrs.get('dataset_path')
+        if dataset_path is None:
+            return cls(df)
+        from data_store import load_or_build_arrays
+        return cls(df, load_or_build_arrays(dataset_path, 'query_index', lambda: cls.build_arrays(df)))
+
+    def footprint(self):
+        from data_store import arrays_footprint
+        return arrays_footprint(self.arrays.values())
+
+    @classmethod
+    def build_arrays(cls, df):
+        categorical_cols, numeric_cols = cls.columns(df)
+        categories = {col: df[col].cat.categories for col in categorical_cols}
+        arrays = {}
+
+        # Mixed-radix combination of the category codes (+1, so missing values get a digit of their own)
+        radices = [len(categories[col]) + 1 for col in categorical_cols]
+        combined = np.zeros(len(df), dtype=np.int64)
+        for col, radix in zip(categorical_cols, radices):
+            combined = combined * radix + (df[col].cat.codes.to_numpy().astype(np.int64) + 1)
+        cell_values, cell_of_row = np.unique(combined, return_inverse=True)
+        n_cells = len(cell_values)
+        cell_keys = np.zeros((len(categorical_cols), n_cells), dtype=np.int64)
+        for i in range(len(categorical_cols) - 1, -1, -1):
+            cell_keys[i] = cell_values % radices[i] - 1
+            cell_values = cell_values // radices[i]
+        for i, col in enumerate(categorical_cols):
+            bitmap = np.zeros((len(categories[col]), n_cells), dtype=bool)
+            present = cell_keys[i] >= 0
+            bitmap[cell_keys[i][present], np.flatnonzero(present)] = True
+            arrays[f"{col}.cells"] = bitmap
+
+        cluster = df[CLUSTER_COL].to_numpy().astype(np.int64)
+        cluster_min = int(cluster.min()) if len(cluster) else 0
+        cluster_span = int(cluster.max()) - cluster_min + 1 if len(cluster) else 1
+        arrays['shape'] = np.array([n_cells, cluster_min, cluster_span], dtype=np.int64)
+        key = cell_of_row.ravel().astype(np.int64) * cluster_span + (cluster - cluster_min)
+        order = np.argsort(key, kind='stable')
+        arrays['key'] = key[order]
+        for col in numeric_cols:
+            arrays[f"{col}.values"] = df[col].to_numpy()[order]
+            if col in METRIC_COLS:
+                arrays[f"{col}.prefix"] = np.concatenate([[0.0], np.cumsum(arrays[f"{col}.values"], dtype=np.float64)])
+        return arrays
+
+    def select_cells(self, equals):
+        # equals: {col: [values]}; values of one column are OR-ed, columns AND-ed
+        mask = np.ones(self.n_cells, dtype=bool)
+        for col, values in equals.items():
+            codes = self.categories[col].get_indexer(values)
+            codes = codes[codes >= 0]
+            mask &= self.cell_bitmaps[col][codes].any(axis=0) if len(codes) else False
+        return np.flatnonzero(mask)
+
+    def blocks(self, cells, cluster_range=(None, None)):
+        # Bounds are clamped to [cluster_min, cluster_max]: keys are cell * span + offset, so an offset
+        # outside the span would read into the neighbouring cells' blocks
+        cluster_max = self.cluster_min + self.cluster_span - 1
+        low, high = cluster_range
+        low = self.cluster_min if low is None else int(np.ceil(low))
+        high = cluster_max if high is None else int(np.floor(high))
+        if high < low or low > cluster_max or high < self.cluster_min:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        low = max(low, self.cluster_min)
+        high = min(high, cluster_max)
+        base = cells.astype(np.int64) * self.cluster_span - self.cluster_min
+        starts = np.searchsorted(self.key, base + low, side='left')
+        stops = np.searchsorted(self.key, base + high, side='right')
+        nonempty = stops > starts
+        return starts[nonempty], stops[nonempty]
+
+    @staticmethod
+    def block_positions(starts, stops):
+        # Concatenated aranges of all blocks
+        lengths = stops - starts
+        if len(lengths) == 0:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return np.arange(int(lengths.sum())) + offsets
+
+    def query(self, equals=None, ranges=None, metric='Price', percentiles=DEFAULT_PERCENTILES):
+        if metric not in self.values:
+            raise KeyError(f"Unknown metric column: {metric}")
+        ranges = {col: bounds for col, bounds in (ranges or {}).items() if bounds != (None, None)}
+        unknown = [col for col in list(equals or {}) + list(ranges)
+                   if col not in self.categories and col not in self.values]
+        if unknown:
+            raise KeyError(f"Unknown filter columns: {', '.join(unknown)}")
+
+        starts, stops = self.blocks(self.select_cells(equals or {}), ranges.pop(CLUSTER_COL, (None, None)))
+        values = None
+        if ranges or percentiles or metric not in self.prefix:
+            positions = self.block_positions(starts, stops)
+            mask = np.ones(len(positions), dtype=bool)
+            for col, (low, high) in ranges.items():
+                column = self.values[col][positions]
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            values = self.values[metric][positions[mask]].astype(np.float64)
+
+        if values is None:
+            count = int((stops - starts).sum())
+            total = float((self.prefix[metric][stops] - self.prefix[metric][starts]).sum())
+        else:
+            count = len(values)
+            total = float(values.sum())
+
+        result = {'count': count, 'metric': metric, 'mean': total / count if count else None}
+        if percentiles:
+            points = np.percentile(values, percentiles) if count else [None] * len(percentiles)
+            result['percentiles'] = {f"p{p:g}": self._native(metric, v) for p, v in zip(percentiles, points)}
+            result['min'] = self._native(metric, values.min()) if count else None
+            result['max'] = self._native(metric, values.max()) if count else None
+        return result
+
+    def _native(self, metric, value):
+        # Values of float32 columns are reported at their own precision (1.6, not 1.600000023841858)
+        if value is None:
+            return None
+        if self.values[metric].dtype == np.float32:
+            return float(str(np.float32(value)))
+        return float(value)
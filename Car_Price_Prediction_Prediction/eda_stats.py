@@ -0,0 +1,22 @@
+import hashlib
+import os
+
+def data_version(path):
+    # Cheap version key for a data file: changes whenever the file is rewritten.
+    # Columnar datasets are versioned by their schema, which is written last
+    if os.path.isdir(path):
+        path = os.path.join(path, 'schema.json')
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def compute_eda_stats(df):
+    # Aggregates served by /eda/stats, converted to plain Python types so they serialize as-is
+    return {
+        "total_rows": int(len(df)),
+        "columns": df.columns.tolist(),
+        "brand_counts": {str(k): int(v) for k, v in df['Brand'].value_counts().items()},
+        "fuel_type_counts": {str(k): int(v) for k, v in df['Fuel Type'].value_counts().items()},
+        "avg_price_by_brand": {str(k): float(v) for k, v in df.groupby('Brand', observed=True)['Price'].mean().items()},
+        "top_models": {str(k): int(v) for k, v in df['Model'].value_counts().head(10).items()}
+    }
@@ -0,0 +1,93 @@
+import json
+import pickle
+
+# The trained pipeline is StandardScaler + OneHotEncoder + LinearRegression, so a prediction is
+# just intercept + sum(coef * (x - mean) / scale) + one coefficient per categorical value.
+# Exporting those numbers lets the API score a single car with a few dict lookups and float ops
+# instead of building a DataFrame and walking the ColumnTransformer. Scoring and loading are plain
+# Python; numpy is only imported by the training-side helpers.
+
+def compile_scorer(model_pipeline):
+    import numpy as np
+    preprocessor = model_pipeline.named_steps['preprocessor']
+    regressor = model_pipeline.named_steps['regressor']
+    coef = np.ravel(regressor.coef_)
+
+    scorer = {
+        'intercept': float(np.ravel(regressor.intercept_)[0]),
+        'numerical': {},
+        'categorical': {}
+    }
+
+    offset = 0
+    for name, transformer, cols in preprocessor.transformers_:
+        if transformer == 'drop' or len(cols) == 0:
+            continue
+        if name == 'num':
+            for i, col in enumerate(cols):
+                scorer['numerical'][col] = {
+                    'mean': float(transformer.mean_[i]),
+                    'scale': float(transformer.scale_[i]),
+                    'coef': float(coef[offset + i])
+                }
+            offset += len(cols)
+        elif name == 'cat':
+            if getattr(transformer, 'drop_idx_', None) is not None:
+                raise ValueError("Fast scorer only supports OneHotEncoder without dropped categories")
+            for i, col in enumerate(cols):
+                categories = transformer.categories_[i]
+                # Unknown categories are ignored by the encoder, i.e. contribute 0
+                scorer['categorical'][col] = {
+                    str(category): float(coef[offset + k]) for k, category in enumerate(categories)
+                }
+                offset += len(categories)
+        else:
+            raise ValueError(f"Unsupported transformer in pipeline: {name}")
+
+    if offset != len(coef):
+        raise ValueError(f"Scorer covers {offset} features but the regressor has {len(coef)}")
+    return scorer
+
+def score_row(scorer, row):
+    prediction = scorer['intercept']
+    for col, params in scorer['numerical'].items():
+        prediction += (float(row[col]) - params['mean']) / params['scale'] * params['coef']
+    for col, table in scorer['categorical'].items():
+        prediction += table.get(str(row[col]), 0.0)
+    return prediction
+
+def check_parity(scorer, model_pipeline, X, tolerance=1e-6, sample=None):
+    # Scores every row of X (or a fixed random `sample` of rows) both ways and fails loudly if the
+    # scorer drifts from the pipeline
+    import numpy as np
+    if sample is not None and len(X) > sample:
+        X = X.sample(n=sample, random_state=0)
+    expected = model_pipeline.predict(X)
+    actual = np.array([score_row(scorer, row) for row in X.to_dict(orient='records')])
+    max_error = float(np.max(np.abs(actual - expected) / np.maximum(np.abs(expected), 1.0)))
+    if max_error > tolerance:
+        raise ValueError(f"Fast scorer disagrees with the pipeline (max relative error {max_error:.3e})")
+    return max_error
+
+def save_scorer(scorer, path):
+    with open(path, 'w') as f:
+        json.dump(scorer, f, indent=1)
+
+def load_scorer(path):
+    with open(path) as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    # Export a scorer for an already trained pipeline and verify it on the full dataset
+    import pandas as pd
+
+    with open('model_pipeline.pkl', 'rb') as f:
+        model_pipeline = pickle.load(f)
+    scorer = compile_scorer(model_pipeline)
+
+    df = pd.read_csv('cleaned_car_price_data_logical.csv')
+    max_error = check_parity(scorer, model_pipeline, df.drop('Price', axis=1))
+    print(f"Parity check passed on {len(df)} rows (max relative error {max_error:.3e})")
+
+    save_scorer(scorer, 'fast_scorer.json')
+    print("Fast scorer saved to fast_scorer.json")
@@ -1,61 +1,160 @@
-from fpdf import FPDF
-import pickle
+import hashlib
+import json
 import os
+import pickle
+
+# PDF report built from a model version's metadata, the EDA aggregates of the serving dataset and the
+# EDA plots. The API caches one report per report_key() (model version, data version and plot files)
+# under reports/ and regenerates it in a background worker when one of them changes, so downloads
+# never wait on FPDF. Run as a script it writes final_report.pdf from the files on disk, as before.
+
+REPORTS_DIR = 'reports'
+PLOTS_DIR = 'plots'
+# Reports of older versions kept next to the current one
+KEEP_REPORTS = 5
+# Bumped when the layout changes, so cached reports are rebuilt
+REPORT_LAYOUT = 2
+
+# Embedded plots, in order, with their captions
+REPORT_PLOTS = [
+    ('price_dist', 'Distribution of car prices'),
+    ('price_by_brand', 'Price by brand'),
+    ('price_vs_year', 'Price vs. year'),
+    ('price_vs_mileage', 'Price vs. mileage'),
+    ('correlation_matrix', 'Correlation of the numerical features')
+]
 
-def generate_report():
-    # Load metadata
+def plot_files(plots_dir=PLOTS_DIR):
+    # (caption, path) of the report plots present in plots_dir
+    return [(caption, os.path.join(plots_dir, f"{name}.png")) for name, caption in REPORT_PLOTS
+            if os.path.isfile(os.path.join(plots_dir, f"{name}.png"))]
+
+def report_key(model_version, data_version, plots_dir=PLOTS_DIR):
+    # Changes whenever the model, the dataset or any embedded plot file changes
+    plots = []
+    for _, path in plot_files(plots_dir):
+        stat = os.stat(path)
+        plots.append([path, stat.st_mtime_ns, stat.st_size])
+    payload = json.dumps([REPORT_LAYOUT, model_version, data_version, plots])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def load_report_metadata():
+    # Metadata of the model in the working directory (JSON from the model artifact, or the legacy pickle)
     try:
+        if os.path.exists('model_artifact'):
+            from model_artifact import load_metadata
+            return load_metadata('model_artifact')
         with open('metadata.pkl', 'rb') as f:
-            metadata = pickle.load(f)
-    except:
-        metadata = {'r2': 0, 'mse': 0, 'brands': [], 'fuel_types': []}
+            return pickle.load(f)
+    except Exception:
+        return {'r2': 0, 'mse': 0, 'brands': [], 'fuel_types': []}
+
+def section(pdf, title):
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(200, 10, txt=title, ln=True)
+    pdf.set_font("Arial", size=12)
+
+def table(pdf, header, rows, widths):
+    pdf.set_font("Arial", 'B', 11)
+    for text, width in zip(header, widths):
+        pdf.cell(width, 8, txt=text, border=1)
+    pdf.ln()
+    pdf.set_font("Arial", size=11)
+    for row in rows:
+        for text, width in zip(row, widths):
+            pdf.cell(width, 8, txt=str(text), border=1)
+        pdf.ln()
+    pdf.set_font("Arial", size=12)
+
+def generate_report(output_path='final_report.pdf', metadata=None, stats=None, plots_dir=PLOTS_DIR, model_version=None):
+    # metadata: the model's metadata dict (loaded from disk when None); stats: the /eda/stats payload
+    # (dataset figures are then taken from the metadata only)
+    from fpdf import FPDF
+
+    if metadata is None:
+        metadata = load_report_metadata()
 
     pdf = FPDF()
     pdf.add_page()
-    
+
     # Title
     pdf.set_font("Arial", 'B', 20)
     pdf.cell(200, 10, txt="Car Price Prediction Project Report", ln=True, align='C')
+    if model_version is not None:
+        pdf.set_font("Arial", size=10)
+        pdf.cell(200, 8, txt=f"Model version {model_version}", ln=True, align='C')
     pdf.ln(10)
-    
+
     # Introduction
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="1. Project Overview", ln=True)
-    pdf.set_font("Arial", size=12)
+    section(pdf, "1. Project Overview")
     pdf.multi_cell(0, 10, txt="This project aims to build a machine learning model to predict car prices based on features such as brand, year, engine size, mileage, and condition. The application consists of a FastAPI backend and a React-based frontend dashboard.")
     pdf.ln(5)
-    
+
     # Methodology
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="2. Methodology", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 10, txt="- Data Loading: Dataset containing 2,500 car records.\n- Data Cleaning: Handling missing values and dropping irrelevant columns (Car ID).\n- Feature Engineering: One-Hot Encoding for categorical variables and Standard Scaling for numerical features.\n- Modeling: Linear Regression pipeline using scikit-learn.")
+    records = f"{stats['total_rows']:,} car records" if stats else "car listings"
+    section(pdf, "2. Methodology")
+    pdf.multi_cell(0, 10, txt=f"- Data Loading: Dataset containing {records}.\n- Data Cleaning: Handling missing values and dropping irrelevant columns (Car ID).\n- Feature Engineering: One-Hot Encoding for categorical variables and Standard Scaling for numerical features.\n- Modeling: Linear Regression pipeline using scikit-learn.")
     pdf.ln(5)
-    
+
     # Results
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="3. Model Performance", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt=f"- R-squared Score: {metadata['r2']:.4f}", ln=True)
-    pdf.cell(200, 10, txt=f"- Mean Squared Error: {metadata['mse']:.2f}", ln=True)
+    section(pdf, "3. Model Performance")
+    pdf.cell(200, 10, txt=f"- R-squared Score: {metadata.get('r2', 0):.4f}", ln=True)
+    pdf.cell(200, 10, txt=f"- Mean Squared Error: {metadata.get('mse', 0):.2f}", ln=True)
+    pdf.cell(200, 10, txt=f"- Root Mean Squared Error: {metadata.get('mse', 0) ** 0.5:,.2f}", ln=True)
+    cv = metadata.get('cv')
+    if cv:
+        pdf.cell(200, 10, txt=f"- Selected by {cv['folds']}-fold cross-validation: {cv['selected']['name']} {cv['selected']['params']}", ln=True)
     pdf.ln(5)
-    
+
     # Dataset Insights
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="4. Dataset Insights", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt=f"- Total Brands: {len(metadata.get('brands', []))}", ln=True)
+    section(pdf, "4. Dataset Insights")
+    pdf.cell(200, 10, txt=f"- Total Brands: {len(stats['brand_counts']) if stats else len(metadata.get('brands', []))}", ln=True)
     pdf.cell(200, 10, txt=f"- Models Covered: {len(metadata.get('models', []))}", ln=True)
+    if stats:
+        pdf.ln(3)
+        brands = sorted(stats['brand_counts'].items(), key=lambda item: item[1], reverse=True)
+        table(pdf, ["Brand", "Listings", "Average price"],
+              [(brand, f"{count:,}", f"{stats['avg_price_by_brand'].get(brand, 0):,.0f}") for brand, count in brands],
+              [60, 40, 50])
+        pdf.ln(3)
+        table(pdf, ["Top model", "Listings"], [(model, f"{count:,}") for model, count in stats['top_models'].items()], [60, 40])
     pdf.ln(5)
-    
+
     # Conclusion
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="5. Conclusion", ln=True)
-    pdf.set_font("Arial", size=12)
+    section(pdf, "5. Conclusion")
     pdf.multi_cell(0, 10, txt="The model exhibits a strong correlation between features and car price, providing reliable estimates for market valuation. The interactive dashboard allows for real-time exploratory analysis and prediction.")
-    
-    pdf.output("final_report.pdf")
-    print("Report generated: final_report.pdf")
+
+    # Figures, two per page
+    plots = plot_files(plots_dir)
+    for i, (caption, path) in enumerate(plots):
+        if i % 2 == 0:
+            pdf.add_page()
+            if i == 0:
+                section(pdf, "Appendix: Exploratory Plots")
+        pdf.set_font("Arial", 'I', 11)
+        pdf.cell(200, 8, txt=caption, ln=True)
+        pdf.image(path, w=170)
+        pdf.ln(4)
+
+    # Written next to the target and renamed, so a concurrent download never sees a partial file
+    tmp_path = f"{output_path}.tmp.{os.getpid()}"
+    pdf.output(tmp_path)
+    os.replace(tmp_path, output_path)
+    print(f"Report generated: {output_path}")
+    return output_path
+
+def prune_reports(reports_dir=REPORTS_DIR, keep=KEEP_REPORTS):
+    reports = sorted((os.path.join(reports_dir, name) for name in os.listdir(reports_dir) if name.endswith('.pdf')),
+                     key=os.path.getmtime, reverse=True)
+    for path in reports[keep:]:
+        os.remove(path)
+
+def build_cached_report(key, metadata, stats, model_version, reports_dir=REPORTS_DIR, plots_dir=PLOTS_DIR):
+    # Worker entry point: writes reports/<key>.pdf and drops the oldest cached reports
+    os.makedirs(reports_dir, exist_ok=True)
+    path = generate_report(os.path.join(reports_dir, f"{key}.pdf"), metadata, stats, plots_dir, model_version)
+    prune_reports(reports_dir)
+    return path
 
 if __name__ == "__main__":
     generate_report()
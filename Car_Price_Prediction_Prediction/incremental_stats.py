@@ -0,0 +1,237 @@
+import argparse
+import os
+import pickle
+
+import numpy as np
+from scipy import sparse
+
+from data_store import iter_table
+from fast_scorer import save_scorer
+from model_artifact import interval_stats, load_artifact, save_artifact
+from model_registry import ARTIFACT_DIR, publish_model
+
+CATEGORICAL_COLS = ['Brand', 'Fuel Type', 'Transmission', 'Condition', 'Model']
+NUMERICAL_COLS = ['Year', 'Engine Size', 'Mileage']
+TARGET_COL = 'Price'
+
+class IncrementalStats:
+    # Aggregate store that can absorb newly appended listings without rereading the history.
+    #
+    # It keeps the sufficient statistics X^T X, X^T y and y^T y of the linear model's design matrix
+    # [1, numeric columns, one-hot categoricals] and the categorical vocabularies. Chunks are encoded as sparse matrices, so
+    # ingesting costs O(rows * nonzeros per row^2) and memory is bounded by the chunk size plus the
+    # features x features statistics; refitting only solves that system, independent of the history size.
+
+    def __init__(self, categorical_cols=CATEGORICAL_COLS, numerical_cols=NUMERICAL_COLS, target_col=TARGET_COL):
+        self.categorical_cols = list(categorical_cols)
+        self.numerical_cols = list(numerical_cols)
+        self.target_col = target_col
+        self.n_rows = 0
+        # Numeric columns are shifted/scaled by a reference fixed on the first chunk so X^T X stays
+        # well conditioned; any fixed affine map gives the same linear model predictions
+        self.shift = None
+        self.scale = None
+        # Design matrix layout: intercept, numeric columns, then one slot per (col, value) seen so far
+        # (so its keys are also each column's vocabulary, in first-seen order)
+        self.feature_index = {col: {} for col in self.categorical_cols}
+        self.n_features = 1 + len(self.numerical_cols)
+        self.xtx = np.zeros((self.n_features, self.n_features))
+        self.xty = np.zeros(self.n_features)
+        self.yty = 0.0
+
+    def ingest(self, chunk):
+        chunk = chunk.dropna(subset=self.categorical_cols + self.numerical_cols + [self.target_col])
+        if len(chunk) == 0:
+            return self
+        y = chunk[self.target_col].to_numpy(dtype=float)
+        values = {col: chunk[col].astype(str) for col in self.categorical_cols}
+
+        X = self._encode(chunk, values)
+        gram = (X.T @ X).tocoo()
+        np.add.at(self.xtx, (gram.row, gram.col), gram.data)
+        self.xty += X.T @ y
+        self.yty += float(y @ y)
+        self.n_rows += len(chunk)
+        return self
+
+    def _encode(self, chunk, values):
+        numeric = chunk[self.numerical_cols].to_numpy(dtype=float)
+        if self.shift is None:
+            self.shift = numeric.mean(axis=0)
+            self.scale = numeric.std(axis=0)
+            self.scale[self.scale == 0] = 1.0
+
+        for col in self.categorical_cols:
+            index = self.feature_index[col]
+            for value in values[col].unique():
+                if value not in index:
+                    index[value] = self.n_features
+                    self.n_features += 1
+        self._grow()
+
+        # Every row has the same nonzero layout: intercept, numeric columns, one slot per categorical
+        n_rows = len(chunk)
+        n_numeric = len(self.numerical_cols)
+        data = np.ones((n_rows, 1 + n_numeric + len(self.categorical_cols)))
+        indices = np.empty(data.shape, dtype=np.int64)
+        data[:, 1:1 + n_numeric] = (numeric - self.shift) / self.scale
+        indices[:, :1 + n_numeric] = np.arange(1 + n_numeric)
+        for i, col in enumerate(self.categorical_cols):
+            indices[:, 1 + n_numeric + i] = values[col].map(self.feature_index[col]).to_numpy()
+        indptr = np.arange(0, data.size + 1, data.shape[1])
+        return sparse.csr_matrix((data.ravel(), indices.ravel(), indptr), shape=(n_rows, self.n_features))
+
+    def _grow(self):
+        extra = self.n_features - len(self.xty)
+        if extra > 0:
+            self.xtx = np.pad(self.xtx, ((0, extra), (0, extra)))
+            self.xty = np.pad(self.xty, (0, extra))
+
+    def solve(self):
+        # Minimum-norm least squares solution of the normal equations, i.e. the same predictions as
+        # LinearRegression on the full history (the one-hot block is rank deficient with an intercept)
+        if self.n_rows == 0:
+            raise ValueError("No rows ingested yet")
+        beta, _, _, _ = np.linalg.lstsq(self.xtx, self.xty, rcond=None)
+        return beta
+
+    def numeric_moments(self):
+        # Mean and population std of the numeric columns, as a StandardScaler would learn them
+        n = self.n_rows
+        sl = slice(1, 1 + len(self.numerical_cols))
+        z_mean = self.xtx[0, sl] / n
+        z_var = np.maximum(np.diag(self.xtx)[sl] / n - z_mean ** 2, 0.0)
+        return self.shift + z_mean * self.scale, np.sqrt(z_var) * self.scale
+
+    def to_scorer(self):
+        # Refit coefficients in the fast_scorer format used by the API
+        beta = self.solve()
+        scorer = {'intercept': float(beta[0]), 'numerical': {}, 'categorical': {}}
+        for i, col in enumerate(self.numerical_cols):
+            scorer['numerical'][col] = {
+                'mean': float(self.shift[i]),
+                'scale': float(self.scale[i]),
+                'coef': float(beta[1 + i])
+            }
+        for col in self.categorical_cols:
+            scorer['categorical'][col] = {value: float(beta[j]) for value, j in self.feature_index[col].items()}
+        return scorer
+
+    def to_artifact(self, path, metadata):
+        # Refit coefficients as a model artifact. The artifact stores true StandardScaler moments, so
+        # the numeric coefficients are rescaled from the fixed reference shift/scale to those moments
+        beta = self.solve()
+        n_numeric = len(self.numerical_cols)
+        means, stds = self.numeric_moments()
+        stds = np.where(stds == 0, 1.0, stds)
+        num_beta = beta[1:1 + n_numeric]
+        intercept = beta[0] + float(np.sum(num_beta * (means - self.shift) / self.scale))
+        categorical = []
+        for col in self.categorical_cols:
+            index = self.feature_index[col]
+            categorical.append((col, list(index), beta[list(index.values())]))
+        save_artifact(path, intercept, (self.numerical_cols, means, stds, num_beta * stds / self.scale),
+                      categorical, metadata, self._interval_stats(beta, means, stds))
+
+    def _interval_stats(self, beta, means, stds):
+        # X^T X in the artifact's design layout is A xtx A^T, where the artifact row is A times this
+        # store's row: numerics re-standardized to the true moments, one-hot slots in feature_index order
+        n_numeric = len(self.numerical_cols)
+        to_artifact = np.zeros((self.n_features, self.n_features))
+        to_artifact[0, 0] = 1.0
+        for i in range(n_numeric):
+            to_artifact[1 + i, 1 + i] = self.scale[i] / stds[i]
+            to_artifact[1 + i, 0] = (self.shift[i] - means[i]) / stds[i]
+        row = 1 + n_numeric
+        for col in self.categorical_cols:
+            for j in self.feature_index[col].values():
+                to_artifact[row, j] = 1.0
+                row += 1
+        xtx = to_artifact @ self.xtx @ to_artifact.T
+        return interval_stats(xtx, self._residual_sum_of_squares(beta), self.n_rows)
+
+    def _residual_sum_of_squares(self, beta):
+        # ||y - X beta||^2 from the sufficient statistics alone
+        return max(self.yty - 2.0 * float(beta @ self.xty) + float(beta @ self.xtx @ beta), 0.0)
+
+    def evaluate(self, model):
+        # MSE and R2 of `model`'s fitted coefficients on the rows ingested into this store (e.g. a
+        # holdout), without a second pass: model's coefficients are mapped onto this store's encoding.
+        # Categories the model never saw contribute 0, like OneHotEncoder(handle_unknown='ignore').
+        beta = model.solve()
+        n_numeric = len(self.numerical_cols)
+        model_num = beta[1:1 + n_numeric]
+        gamma = np.zeros(self.n_features)
+        gamma[0] = beta[0] + float(np.sum(model_num * (self.shift - model.shift) / model.scale))
+        gamma[1:1 + n_numeric] = model_num * self.scale / model.scale
+        for col in self.categorical_cols:
+            model_index = model.feature_index[col]
+            for value, j in self.feature_index[col].items():
+                if value in model_index:
+                    gamma[j] = beta[model_index[value]]
+
+        mse = self._residual_sum_of_squares(gamma) / self.n_rows
+        y_mean = self.xty[0] / self.n_rows
+        variance = self.yty / self.n_rows - y_mean ** 2
+        return mse, (1.0 - mse / variance) if variance > 0 else 0.0
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def ingest_table(stats, data_path, chunksize=100000):
+    # Columnar dataset or CSV, streamed in chunks through data_store.iter_table
+    for chunk in iter_table(data_path, chunksize, columns=stats.categorical_cols + stats.numerical_cols + [stats.target_col]):
+        stats.ingest(chunk)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest new listings into the incremental statistics store")
+    parser.add_argument('new_rows', nargs='*', help="CSV files or columnar datasets with appended listings")
+    parser.add_argument('--state', default='incremental_stats.pkl')
+    parser.add_argument('--data', default='cleaned_car_price_data_logical.cols',
+                        help="Full dataset used to bootstrap the store when no state exists yet")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.state):
+        stats = IncrementalStats.load(args.state)
+    else:
+        print(f"No state at {args.state}, bootstrapping from {args.data}")
+        stats = ingest_table(IncrementalStats(), args.data, args.chunksize)
+
+    for path in args.new_rows:
+        before = stats.n_rows
+        ingest_table(stats, path, args.chunksize)
+        print(f"Ingested {stats.n_rows - before} rows from {path}")
+
+    stats.save(args.state)
+    print(f"State saved to {args.state} ({stats.n_rows} rows)")
+
+    # Publish the refit like model_utils.train_streaming: the API serves the registry's active
+    # model_artifact, so writing fast_scorer.json alone would never reach /predict
+    mse, r2 = stats.evaluate(stats)
+    metadata = {
+        'categorical_cols': stats.categorical_cols,
+        'numerical_cols': stats.numerical_cols,
+        'brands': list(stats.feature_index['Brand']),
+        'fuel_types': list(stats.feature_index['Fuel Type']),
+        'transmissions': list(stats.feature_index['Transmission']),
+        'conditions': list(stats.feature_index['Condition']),
+        'models': list(stats.feature_index['Model']),
+        # In-sample: the store keeps no holdout
+        'mse': mse,
+        'r2': r2,
+        'training': {'mode': 'incremental', 'rows': stats.n_rows, 'state': args.state}
+    }
+    stats.to_artifact(ARTIFACT_DIR, metadata)
+    save_scorer(load_artifact(ARTIFACT_DIR).to_scorer(), 'fast_scorer.json')
+    with open('metadata.pkl', 'wb') as f:
+        pickle.dump(metadata, f)
+    version = publish_model(files=['metadata.pkl', 'fast_scorer.json', ARTIFACT_DIR])
+    print(f"Refitted model version {version} active (running APIs pick it up on their next registry poll)")
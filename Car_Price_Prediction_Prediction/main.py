@@ -1,14 +1,54 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-import pandas as pd
-import pickle
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import os
+import io
+import csv
+import json
+import time
 import base64
-from typing import List, Dict
+import asyncio
+import hashlib
+import multiprocessing
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, List, Dict, Optional
+from fast_scorer import score_row
+from eda_stats import compute_eda_stats, data_version
+from cache_utils import LRUCache
+from batching import MicroBatcher
+from model_registry import ModelBundle, active_version, list_versions, load_bundle, warm_bundle
+from metrics import MetricsMiddleware, MetricsRegistry, checkpoint
+from generate_report import REPORTS_DIR, build_cached_report, report_key
+# numpy, pandas, scipy and the data/index/plot modules built on them are imported where they are
+# used (mostly by load_state in the background), so importing this module costs about as much as
+# importing FastAPI and the process answers /health right away
 
-app = FastAPI(title="Car Price Prediction API")
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow is optional; without it plots are only served as PNG
+    Image = None
+
+@asynccontextmanager
+async def lifespan(app):
+    loader = asyncio.get_running_loop().run_in_executor(None, load_state)
+    if not BACKGROUND_LOAD:
+        await loader
+    background = asyncio.create_task(after_load(loader))
+    yield
+    background.cancel()
+    await predict_batcher.stop()
+    if render_pool is not None:
+        render_pool.shutdown(cancel_futures=True)
+    if report_pool is not None:
+        report_pool.shutdown(cancel_futures=True)
+
+app = FastAPI(title="Car Price Prediction API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -17,20 +57,119 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Load model and metadata
-try:
-    with open('model_pipeline.pkl', 'rb') as f:
-        model = pickle.load(f)
-    with open('metadata.pkl', 'rb') as f:
-        metadata = pickle.load(f)
-    df_cleaned = pd.read_csv('cleaned_car_price_data_logical.csv')
-except Exception as e:
-    print(f"Error loading model or data: {e}")
-    model = None
-    metadata = {}
-    df_cleaned = None
+# Per-route latency histograms plus hot-path spans, scraped from /metrics. Added last, so it is the
+# outermost middleware and times the whole request; CAR_API_METRICS=0 turns it off
+metrics = MetricsRegistry()
+METRICS_ENABLED = os.environ.get('CAR_API_METRICS', '1') != '0'
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
+DATA_PATH = 'cleaned_car_price_data_logical.cols'
+# Compact read-only copy memory-mapped by every worker; set CAR_API_SHARED_DATASET=0 for a private copy
+SERVING_DATA_PATH = 'cleaned_car_price_data_logical.serving.cols'
+SHARED_DATASET = os.environ.get('CAR_API_SHARED_DATASET', '1') != '0'
+
+# The compiled fast_scorer.json is used for single predictions when present;
+# CAR_API_FAST_SCORER=0 forces the (micro-batched) pipeline path
+USE_FAST_SCORER = os.environ.get('CAR_API_FAST_SCORER', '1') != '0'
+# Versions without a model_artifact/ directory are only servable by unpickling their pipeline;
+# CAR_API_ALLOW_PICKLE=0 refuses them (e.g. when models come from shared storage)
+ALLOW_PICKLE = os.environ.get('CAR_API_ALLOW_PICKLE', '1') != '0'
+# Confidence level of the prediction intervals returned next to predictions (models trained with
+# ordinary least squares into a model_artifact/ only)
+INTERVAL_LEVEL = float(os.environ.get('CAR_API_INTERVAL_LEVEL', '0.95'))
+# Seconds between checks of the model registry's ACTIVE pointer (0 disables polling)
+MODEL_POLL_SECONDS = float(os.environ.get('CAR_API_MODEL_POLL_SECONDS', '0'))
+# Model and data load in a background thread after startup: /health answers at once and /ready
+# returns 503 until loading is done. CAR_API_BACKGROUND_LOAD=0 loads before the server accepts requests
+BACKGROUND_LOAD = os.environ.get('CAR_API_BACKGROUND_LOAD', '1') != '0'
+
+# Serving state, filled in by load_state(). Handlers read `bundle` once per request, so a reload
+# swapping it never mixes two versions within a request
+bundle = ModelBundle()
+reload_lock = asyncio.Lock()
+df_cleaned = None
+# EDA aggregates are computed once per data version and served pre-serialized with an ETag,
+# so repeat dashboard loads are answered with 304 Not Modified
+dataset_version = None
+eda_stats_body = None
+eda_stats_etag = None
+# Per-column indexes backing the filtered, paginated /eda/sample, the clustered index for /eda/query
+# and the per-model KD-trees for /similar
+dataset_index = None
+query_index = None
+similar_index = None
+# 'loading' -> 'ready' (or 'failed' if loading itself crashed), with the seconds each step took and
+# the errors of failed steps (reported by /ready)
+startup = {'state': 'loading', 'timings': {}, 'errors': {}}
+STARTED_AT = time.perf_counter()
+
+def load_state():
+    # The model comes first so /predict serves while the data indexes are still being built. The
+    # state always leaves 'loading', so /ready and the 503s of not_ready() cannot hang forever
+    try:
+        _load_state()
+        startup['state'] = 'ready'
+    except Exception as e:
+        print(f"Startup failed: {e}")
+        startup['errors']['startup'] = str(e)
+        startup['state'] = 'failed'
+    finally:
+        startup['ready_after_s'] = round(time.perf_counter() - STARTED_AT, 3)
+    print(f"{startup['state'].capitalize()} after {startup['ready_after_s']}s (model version {bundle.version})")
+
+def _load_state():
+    global bundle, df_cleaned, dataset_version, eda_stats_body, eda_stats_etag
+    global dataset_index, query_index, similar_index
+
+    def step(name, load):
+        start = time.perf_counter()
+        try:
+            return load()
+        except Exception as e:
+            print(f"Error loading {name}: {e}")
+            startup['errors'][name] = str(e)
+            return None
+        finally:
+            startup['timings'][name] = round(time.perf_counter() - start, 3)
+
+    # Active model version (model, metadata and compiled scorer), unless a reload got there first
+    loaded = step('model', lambda: load_bundle(use_scorer=USE_FAST_SCORER, allow_pickle=ALLOW_PICKLE))
+    if loaded is not None and bundle.model is None:
+        bundle = loaded
+
+    def load_data():
+        from data_store import load_serving_dataset, table_source
+        # Versioned by the file actually read (the CSV import while the columnar dataset is missing)
+        version = data_version(table_source(DATA_PATH))
+        return load_serving_dataset(DATA_PATH, SERVING_DATA_PATH, shared=SHARED_DATASET), version
+
+    df, version = step('data', load_data) or (None, None)
+    if df is not None:
+        body = step('eda_stats', lambda: json.dumps(compute_eda_stats(df)).encode('utf-8'))
+        from dataset_index import DatasetIndex, QueryIndex
+        from similar_index import SimilarIndex
+        dataset_index = step('dataset_index', lambda: DatasetIndex.for_dataset(df))
+        query_index = step('query_index', lambda: QueryIndex.for_dataset(df))
+        similar_index = step('similar_index', lambda: SimilarIndex(df))
+        dataset_version, eda_stats_body, eda_stats_etag = version, body, f'"{version}"'
+        df_cleaned = df
+
+async def after_load(loader):
+    await loader
+    if bundle.model is not None:
+        schedule_report()
+    if MODEL_POLL_SECONDS > 0:
+        await poll_model_registry()
+
+def not_ready(what: str):
+    # 503 (retry shortly) while the background load is running, 500 if it finished without `what`
+    if startup['state'] == 'loading':
+        raise HTTPException(status_code=503, detail=f"{what} still loading", headers={"Retry-After": "1"})
+    raise HTTPException(status_code=500, detail=f"{what} not loaded")
 
 class CarFeatures(BaseModel):
     Brand: str
@@ -42,77 +181,703 @@ class CarFeatures(BaseModel):
     Condition: str
     Model: str
 
+# Request field -> training column name, in the column order the pipeline was fitted on
+FEATURE_COLUMNS = {
+    'Brand': 'Brand',
+    'Year': 'Year',
+    'Engine_Size': 'Engine Size',
+    'Fuel_Type': 'Fuel Type',
+    'Transmission': 'Transmission',
+    'Mileage': 'Mileage',
+    'Condition': 'Condition',
+    'Model': 'Model'
+}
+# Uploaded files may use either the API field names or the CSV column names
+COLUMN_ALIASES = {column: field for field, column in FEATURE_COLUMNS.items()}
+
+MAX_BATCH_ROWS = 10000
+
+# /eda/sample page size limits: JSON pages are built in memory, NDJSON is streamed block by block
+SAMPLE_MAX_ROWS = 1000
+SAMPLE_STREAM_MAX_ROWS = 1000000
+SAMPLE_STREAM_BLOCK_ROWS = 5000
+
+SIMILAR_MAX_K = 100
+
+PLOTS_DIR = 'plots'
+PLOT_MAX_AGE = 86400
+# Hot plot images (PNG and WebP variants), keyed by (plot, mtime, variant)
+plot_cache = LRUCache(max_entries=64, max_bytes=32 * 2 ** 20)
+
+def run_in_pool(get_pool, reset_pool, fn, *args):
+    # run_in_executor on a lazily created process pool. Once a worker dies the pool is broken for
+    # good and every submit raises BrokenProcessPool, so the pool is replaced and the submit retried once
+    loop = asyncio.get_running_loop()
+    try:
+        return loop.run_in_executor(get_pool(), fn, *args)
+    except BrokenProcessPool:
+        reset_pool()
+        return loop.run_in_executor(get_pool(), fn, *args)
+
+# On-demand renders run in a process pool (created on first use) off the event loop, and are cached
+# by (plot, filter, data version); concurrent requests for the same render share one job
+RENDER_WORKERS = int(os.environ.get('CAR_API_RENDER_WORKERS', '2'))
+render_pool = None
+render_cache = LRUCache(max_entries=256, max_bytes=64 * 2 ** 20)
+render_inflight = {}
+
+def get_render_pool():
+    global render_pool
+    import plot_service
+    if render_pool is None:
+        render_pool = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=plot_service.init_worker,
+            initargs=(DATA_PATH, SERVING_DATA_PATH, SHARED_DATASET)
+        )
+    return render_pool
+
+def reset_render_pool():
+    global render_pool
+    if render_pool is not None:
+        render_pool.shutdown(wait=False, cancel_futures=True)
+        render_pool = None
+
+# The PDF report of the serving model and data is generated by a single background process and cached
+# under reports/<key>.pdf (see generate_report.report_key); a new model or dataset schedules the next one
+STATIC_REPORT_PATH = 'final_report.pdf'
+# Seconds /download-report waits for a report that is still being generated before answering 202
+REPORT_WAIT_SECONDS = 10.0
+# A failed build (missing font, full disk, ...) is retried by the first request after this many seconds
+REPORT_RETRY_SECONDS = float(os.environ.get('CAR_API_REPORT_RETRY_SECONDS', '60'))
+report_pool = None
+report_jobs = {}
+# key -> (error message, time.monotonic() of the failure)
+report_errors = {}
+
+def get_report_pool():
+    global report_pool
+    if report_pool is None:
+        report_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    return report_pool
+
+def reset_report_pool():
+    global report_pool
+    if report_pool is not None:
+        report_pool.shutdown(wait=False, cancel_futures=True)
+        report_pool = None
+
+def current_report():
+    key = report_key(bundle.version, dataset_version)
+    return key, os.path.join(REPORTS_DIR, f"{key}.pdf")
+
+def schedule_report():
+    # Starts building the current report unless it exists, is in progress or failed less than
+    # REPORT_RETRY_SECONDS ago. Never raises: a build that cannot even be submitted is recorded as failed
+    key, path = current_report()
+    if key in report_errors and time.monotonic() - report_errors[key][1] >= REPORT_RETRY_SECONDS:
+        report_errors.pop(key)
+    if key in report_jobs or key in report_errors or os.path.exists(path):
+        return report_jobs.get(key)
+    try:
+        stats = json.loads(eda_stats_body) if eda_stats_body is not None else None
+        job = run_in_pool(get_report_pool, reset_report_pool, build_cached_report, key, bundle.metadata,
+                          stats, bundle.version)
+    except Exception as e:
+        report_errors[key] = (str(e), time.monotonic())
+        print(f"Report generation could not start: {e}")
+        return None
+    report_jobs[key] = job
+    job.add_done_callback(lambda done: finish_report(key, done))
+    return job
+
+def finish_report(key: str, job):
+    report_jobs.pop(key, None)
+    if not job.cancelled() and job.exception() is not None:
+        report_errors[key] = (str(job.exception()), time.monotonic())
+        print(f"Report generation failed: {job.exception()}")
+
+def to_records(frame: "pd.DataFrame") -> List[Dict[str, Any]]:
+    # float32 columns go through their shortest repr so 2.3 isn't served as 2.299999952316284
+    import numpy as np
+    frame = frame.copy()
+    for col, dtype in frame.dtypes.items():
+        if dtype == np.float32:
+            frame[col] = frame[col].to_numpy().astype(str).astype(np.float64)
+    return frame.to_dict(orient='records')
+
+def encode_cursor(row: int) -> str:
+    # Opaque pagination cursor: the last row id served, bound to the dataset version
+    payload = json.dumps({'v': dataset_version, 'row': int(row)}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return -1
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        row = payload['row']
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Row ids are non-negative (-1 is the start); a negative id would make iloc read from the end
+    if type(row) is not int or row < -1:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if payload.get('v') != dataset_version:
+        raise HTTPException(status_code=410, detail="Cursor belongs to a previous dataset version; restart pagination")
+    return row
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.replace('W/', '', 1) == etag for tag in candidates)
+
+def features_to_row(features: CarFeatures) -> Dict[str, Any]:
+    # Normalized so equivalent requests share a cache entry (and " BMW" isn't an unknown category)
+    row = {}
+    for field, column in FEATURE_COLUMNS.items():
+        value = getattr(features, field)
+        row[column] = value.strip() if isinstance(value, str) else value
+    return row
+
+# Repeated requests (same car from listing pages) are answered from an LRU/TTL cache keyed on the
+# normalized features and the model version, so a model reload never serves stale prices
+prediction_cache = LRUCache(
+    max_entries=int(os.environ.get('CAR_API_PREDICTION_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('CAR_API_PREDICTION_CACHE_TTL', '3600'))
+)
+
+def prediction_cache_key(row: Dict[str, Any], version: str) -> tuple:
+    return (version,) + tuple(
+        float(value) if isinstance(value, (int, float)) else value for value in row.values()
+    )
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+def predict_rows(rows: List[Dict[str, Any]], model=None):
+    # One vectorized pipeline call for many rows in training column layout
+    import pandas as pd
+    model = model if model is not None else bundle.model
+    frame = pd.DataFrame(rows, columns=list(FEATURE_COLUMNS.values()))
+    checkpoint('features')
+    if hasattr(model, 'named_steps'):
+        # Pickled sklearn pipeline: ColumnTransformer and regressor timed separately
+        encoded = model[:-1].transform(frame)
+        checkpoint('preprocess')
+        predictions = model[-1].predict(encoded)
+    else:
+        predictions = model.predict(frame)
+    checkpoint('predict')
+    return predictions
+
+def prediction_intervals(rows: List[Dict[str, Any]], predictions, model=None):
+    # [lower, upper] per row from one vectorized pass over the artifact's (X^T X)^+, or None when
+    # the model carries no interval statistics (pickled pipelines, regularized regressors)
+    model = model if model is not None else bundle.model
+    half_widths = getattr(model, 'interval_half_widths', lambda rows, level: None)(rows, INTERVAL_LEVEL)
+    if half_widths is None:
+        return None
+    import numpy as np
+    predictions = np.asarray(predictions, dtype=np.float64)
+    return np.column_stack([predictions - half_widths, predictions + half_widths])
+
+def format_interval(interval) -> Dict[str, Any]:
+    return {"level": INTERVAL_LEVEL, "lower": round(float(interval[0]), 2), "upper": round(float(interval[1]), 2)}
+
+# Concurrent /predict calls on the pipeline path are coalesced into one model.predict per window
+predict_batcher = MicroBatcher(
+    predict_rows,
+    max_batch_size=int(os.environ.get('CAR_API_BATCH_MAX_ROWS', '256')),
+    max_wait_ms=float(os.environ.get('CAR_API_BATCH_WINDOW_MS', '2'))
+)
+
+metrics.gauge('prediction_cache', "Prediction cache counters and size",
+              lambda: {(('stat', name),): value for name, value in prediction_cache.stats().items()})
+metrics.gauge('predict_batcher', "Micro-batcher counters",
+              lambda: {(('stat', name),): value for name, value in predict_batcher.stats().items()})
+metrics.gauge('model_info', "Loaded model version (value is 1)",
+              lambda: {(('version', str(bundle.version)),): 1} if bundle.model is not None else {})
+
+def predict_batch_rows(rows: List[Any], row_errors: Dict[int, str] = None) -> Dict[str, Any]:
+    # Validate every row on its own so one bad row doesn't fail the whole batch,
+    # then score all valid rows with a single vectorized model.predict call
+    current = bundle
+    checkpoint('parse')
+    row_errors = dict(row_errors or {})
+    valid_indices = []
+    valid_rows = []
+    for i, row in enumerate(rows):
+        if i in row_errors:
+            continue
+        if not isinstance(row, dict):
+            row_errors[i] = "Row must be an object of car features"
+            continue
+        try:
+            features = CarFeatures(**{COLUMN_ALIASES.get(key, key): value for key, value in row.items()})
+        except ValidationError as e:
+            row_errors[i] = format_validation_error(e)
+            continue
+        valid_indices.append(i)
+        valid_rows.append(features_to_row(features))
+    checkpoint('validation')
+
+    predictions = {}
+    missing_indices = []
+    missing_rows = []
+    for i, row in zip(valid_indices, valid_rows):
+        cached = prediction_cache.get(prediction_cache_key(row, current.version))
+        if cached is None:
+            missing_indices.append(i)
+            missing_rows.append(row)
+        else:
+            predictions[i] = cached
+    checkpoint('cache')
+    if missing_rows:
+        try:
+            for i, row, prediction in zip(missing_indices, missing_rows, predict_rows(missing_rows, current.model)):
+                predictions[i] = prediction_cache.set(prediction_cache_key(row, current.version), float(prediction))
+        except Exception as e:
+            for i in missing_indices:
+                row_errors[i] = str(e)
+
+    # Intervals for every scored row (cached or not) in one call
+    scored = [(i, row) for i, row in zip(valid_indices, valid_rows) if i in predictions]
+    intervals = None
+    if scored:
+        try:
+            intervals = prediction_intervals([row for _, row in scored], [predictions[i] for i, _ in scored],
+                                             current.model)
+        except Exception:
+            intervals = None
+    interval_of = dict(zip((i for i, _ in scored), intervals)) if intervals is not None else {}
+    checkpoint('intervals')
+
+    results = []
+    for i in range(len(rows)):
+        if i in predictions:
+            result = {"index": i, "predicted_price": round(float(predictions[i]), 2)}
+            if i in interval_of:
+                result["interval"] = format_interval(interval_of[i])
+            results.append(result)
+        else:
+            results.append({"index": i, "error": row_errors[i]})
+
+    checkpoint('results')
+    return {
+        "count": len(rows),
+        "succeeded": len(predictions),
+        "failed": len(rows) - len(predictions),
+        "results": results
+    }
+
+def parse_ndjson(body: str):
+    rows = []
+    row_errors = {}
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            row_errors[len(rows)] = f"Invalid JSON: {e.msg}"
+            rows.append(None)
+    return rows, row_errors
+
+def load_and_warm(version: Optional[str] = None) -> ModelBundle:
+    new_bundle = load_bundle(version, use_scorer=USE_FAST_SCORER, allow_pickle=ALLOW_PICKLE)
+    warm_bundle(new_bundle, df_cleaned.head(32) if df_cleaned is not None else [])
+    return new_bundle
+
+async def reload_model(version: Optional[str] = None) -> bool:
+    # Loads and warms the new version in a worker thread while the current one keeps serving,
+    # then swaps the bundle reference. Returns False if that version is already live
+    global bundle
+    async with reload_lock:
+        new_bundle = await run_in_threadpool(load_and_warm, version)
+        if new_bundle.version == bundle.version:
+            return False
+        bundle = new_bundle
+        prediction_cache.clear()
+        print(f"Serving model version {bundle.version}")
+    # Outside the swap: the new version is live whatever happens to its report
+    schedule_report()
+    return True
+
+async def poll_model_registry():
+    # Picks up `python model_registry.py activate <version>` in every worker without a restart
+    while True:
+        await asyncio.sleep(MODEL_POLL_SECONDS)
+        try:
+            version = active_version()
+            if version is not None and version != bundle.version:
+                await reload_model(version)
+        except Exception as e:
+            print(f"Model reload failed, keeping version {bundle.version}: {e}")
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": model is not None}
+    # Liveness: answers as soon as the process is up, also while the model and data are loading
+    return {"status": "ok", "state": startup['state'], "model_loaded": bundle.model is not None,
+            "model_version": bundle.version}
+
+@app.get("/ready")
+def ready():
+    # Readiness: 200 once the background load finished with a model (route traffic here), else 503
+    is_ready = startup['state'] == 'ready' and bundle.model is not None
+    body = {"ready": is_ready, "model_version": bundle.version, "data_loaded": df_cleaned is not None, **startup}
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition of the request/span histograms and cache/batcher/model gauges
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/models")
+def get_models():
+    return {"active_version": active_version(), "loaded_version": bundle.version, "versions": list_versions()}
+
+@app.post("/models/reload")
+async def post_model_reload(version: Optional[str] = None):
+    # Loads the given (default: the registry's active) version; on failure the old model keeps serving
+    previous_version = bundle.version
+    try:
+        swapped = await reload_model(version)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=f"Could not load model version: {e}")
+    return {"previous_version": previous_version, "loaded_version": bundle.version, "swapped": swapped}
+
+@app.get("/predict/cache")
+def get_prediction_cache_stats():
+    return {"model_version": bundle.version, **prediction_cache.stats()}
+
+@app.get("/predict/batcher")
+def get_batcher_stats():
+    return predict_batcher.stats()
 
 @app.get("/eda/metadata")
 def get_metadata():
-    return metadata
+    return bundle.metadata
 
 @app.get("/eda/stats")
-def get_stats():
-    if df_cleaned is None:
-        raise HTTPException(status_code=500, detail="Data not loaded")
+def get_stats(request: Request):
+    if eda_stats_body is None:
+        not_ready("Data")
     
-    # Return some basic statistics
-    stats = {
-        "total_rows": len(df_cleaned),
-        "columns": df_cleaned.columns.tolist(),
-        "brand_counts": df_cleaned['Brand'].value_counts().to_dict(),
-        "fuel_type_counts": df_cleaned['Fuel Type'].value_counts().to_dict(),
-        "avg_price_by_brand": df_cleaned.groupby('Brand')['Price'].mean().to_dict(),
-        "top_models": df_cleaned['Model'].value_counts().head(10).to_dict()
-    }
-    return stats
+    # Return some basic statistics, precomputed at startup
+    headers = {"ETag": eda_stats_etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, eda_stats_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=eda_stats_body, media_type="application/json", headers=headers)
+
+def stream_sample(rows_after: int, n: int, columns: List[str], equals, ranges):
+    # NDJSON records in blocks; if the page is full, a final {"next_cursor": ...} line follows
+    sent = 0
+    for matches in dataset_index.iter_matches(equals, ranges, rows_after, SAMPLE_STREAM_BLOCK_ROWS):
+        matches = matches[:n - sent]
+        records = to_records(df_cleaned.iloc[matches][columns])
+        yield ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+        sent += len(matches)
+        if sent >= n:
+            yield (json.dumps({"next_cursor": encode_cursor(matches[-1])}) + '\n').encode('utf-8')
+            return
 
 @app.get("/eda/sample")
-def get_sample(n: int = 10):
+def get_sample(n: int = 10, cursor: Optional[str] = None, columns: Optional[str] = None,
+               brand: Optional[str] = None, year_min: Optional[int] = None, year_max: Optional[int] = None,
+               price_min: Optional[float] = None, price_max: Optional[float] = None,
+               output_format: str = Query('json', alias='format')):
+    # Pages through the dataset in row order. JSON (the dashboard default) returns a list of records
+    # and the next page's cursor in the X-Next-Cursor header; format=ndjson streams up to
+    # SAMPLE_STREAM_MAX_ROWS rows with constant memory
     if df_cleaned is None:
-        raise HTTPException(status_code=500, detail="Data not loaded")
-    return df_cleaned.head(n).to_dict(orient='records')
+        not_ready("Data")
+    if output_format not in ('json', 'ndjson'):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    max_rows = SAMPLE_MAX_ROWS if output_format == 'json' else SAMPLE_STREAM_MAX_ROWS
+    if not 1 <= n <= max_rows:
+        raise HTTPException(status_code=400, detail=f"n must be between 1 and {max_rows} for format={output_format}")
 
-@app.get("/eda/plots/{plot_name}")
-def get_plot(plot_name: str):
-    plot_path = f"plots/{plot_name}.png"
-    if not os.path.exists(plot_path):
+    selected = df_cleaned.columns.tolist()
+    if columns:
+        selected = [col.strip() for col in columns.split(',') if col.strip()]
+        unknown = [col for col in selected if col not in df_cleaned.columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+
+    equals = {'Brand': brand.strip()} if brand is not None else {}
+    ranges = {'Year': (year_min, year_max), 'Price': (price_min, price_max)}
+    rows_after = decode_cursor(cursor)
+
+    if output_format == 'ndjson':
+        return StreamingResponse(stream_sample(rows_after, n, selected, equals, ranges),
+                                 media_type="application/x-ndjson")
+
+    rows = dataset_index.take(n, equals, ranges, rows_after)
+    headers = {"X-Next-Cursor": encode_cursor(rows[-1])} if len(rows) == n else {}
+    return JSONResponse(to_records(df_cleaned.iloc[rows][selected]), headers=headers)
+
+@app.get("/eda/query")
+def query_listings(brand: Optional[List[str]] = Query(None), model: Optional[List[str]] = Query(None),
+                   condition: Optional[List[str]] = Query(None), fuel_type: Optional[List[str]] = Query(None),
+                   transmission: Optional[List[str]] = Query(None),
+                   year_min: Optional[int] = None, year_max: Optional[int] = None,
+                   mileage_min: Optional[float] = None, mileage_max: Optional[float] = None,
+                   price_min: Optional[float] = None, price_max: Optional[float] = None,
+                   engine_size_min: Optional[float] = None, engine_size_max: Optional[float] = None,
+                   metric: str = 'Price', percentiles: Optional[str] = None):
+    # Filtered count / mean / percentiles of `metric`, e.g. ?brand=BMW&model=5 Series&condition=Used
+    # &year_min=2015&year_max=2018. Repeating a categorical parameter matches any of its values.
+    # percentiles defaults to 5,25,50,75,95; percentiles=none (or empty) returns count and mean only,
+    # which are answered from prefix sums without gathering the matching rows
+    if query_index is None:
+        not_ready("Data")
+    from dataset_index import DEFAULT_PERCENTILES
+    try:
+        if percentiles is None:
+            points = DEFAULT_PERCENTILES
+        elif percentiles.strip().lower() in ('', 'none'):
+            points = []
+        else:
+            points = [float(p) for p in percentiles.split(',')]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles must be a comma separated list of numbers")
+    if any(not 0 <= p <= 100 for p in points):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+
+    equals = {column: [value.strip() for value in values] for column, values in (
+        ('Brand', brand), ('Model', model), ('Condition', condition), ('Fuel Type', fuel_type),
+        ('Transmission', transmission)) if values}
+    ranges = {
+        'Year': (year_min, year_max),
+        'Mileage': (mileage_min, mileage_max),
+        'Price': (price_min, price_max),
+        'Engine Size': (engine_size_min, engine_size_max)
+    }
+    metric = FEATURE_COLUMNS.get(metric, metric)
+    start = time.perf_counter()
+    try:
+        result = query_index.query(equals, ranges, metric, points)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    result['took_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+    return result
+
+@app.get("/health/memory")
+def get_memory():
+    # Per-worker memory figures for sizing deployments
+    if df_cleaned is None:
+        not_ready("Data")
+    from data_store import memory_report
+    indexes = {name: index.footprint() for name, index in
+               [('dataset_index', dataset_index), ('query_index', query_index), ('similar_index', similar_index)]
+               if index is not None}
+    return {"pid": os.getpid(), "shared_dataset": SHARED_DATASET, **memory_report(df_cleaned, indexes)}
+
+def plot_file(plot_name: str):
+    # Only names of existing PNGs in the plots directory are accepted (no path traversal)
+    if os.path.basename(plot_name) != plot_name or not os.path.isfile(os.path.join(PLOTS_DIR, f"{plot_name}.png")):
         raise HTTPException(status_code=404, detail="Plot not found")
-    
+    plot_path = os.path.join(PLOTS_DIR, f"{plot_name}.png")
+    return plot_path, os.stat(plot_path)
+
+def read_plot_png(plot_path: str) -> bytes:
     with open(plot_path, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+        return image_file.read()
+
+def encode_webp(png_bytes: bytes) -> bytes:
+    output = io.BytesIO()
+    Image.open(io.BytesIO(png_bytes)).save(output, format='WEBP', lossless=True)
+    return output.getvalue()
+
+def not_modified_since(request: Request, mtime: float) -> bool:
+    if_modified_since = request.headers.get('if-modified-since')
+    if not if_modified_since or request.headers.get('if-none-match'):
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+@app.get("/eda/plots/{plot_name}")
+def get_plot(plot_name: str):
+    # Kept for compatibility; prefer /eda/plots/{plot_name}/image
+    plot_path, stat = plot_file(plot_name)
+    png_bytes = plot_cache.get_or_set((plot_name, stat.st_mtime_ns, 'png'), lambda: read_plot_png(plot_path))
+    encoded_string = base64.b64encode(png_bytes).decode('utf-8')
     
     return {"image": encoded_string}
 
+@app.get("/eda/plots/{plot_name}/image")
+def get_plot_image(plot_name: str, request: Request):
+    # Raw image bytes with validators and long-lived caching; WebP when the client accepts it
+    plot_path, stat = plot_file(plot_name)
+    use_webp = Image is not None and 'image/webp' in request.headers.get('accept', '')
+    variant = 'webp' if use_webp else 'png'
+
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{variant}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={PLOT_MAX_AGE}",
+        "Vary": "Accept"
+    }
+    if etag_matches(request, headers["ETag"]) or not_modified_since(request, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    png_bytes = plot_cache.get_or_set((plot_name, stat.st_mtime_ns, 'png'), lambda: read_plot_png(plot_path))
+    if use_webp:
+        content = plot_cache.get_or_set((plot_name, stat.st_mtime_ns, 'webp'), lambda: encode_webp(png_bytes))
+        return Response(content=content, media_type="image/webp", headers=headers)
+    return Response(content=png_bytes, media_type="image/png", headers=headers)
+
+@app.get("/eda/render/{plot_name}")
+async def render_plot(plot_name: str, request: Request, brand: Optional[str] = None, year_min: Optional[int] = None,
+                      year_max: Optional[int] = None, condition: Optional[str] = None):
+    if df_cleaned is None:
+        not_ready("Data")
+    import plot_service
+    if plot_name not in plot_service.PLOT_NAMES:
+        raise HTTPException(status_code=404, detail="Plot not found")
+
+    filters = {'brand': brand, 'year_min': year_min, 'year_max': year_max, 'condition': condition}
+    key = (plot_name, brand, year_min, year_max, condition, dataset_version)
+    etag = f'"{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PLOT_MAX_AGE}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    content = render_cache.get(key)
+    if content is None:
+        job = render_inflight.get(key)
+        if job is None:
+            job = run_in_pool(get_render_pool, reset_render_pool, plot_service.render_task, plot_name, filters)
+            render_inflight[key] = job
+            job.add_done_callback(lambda _: render_inflight.pop(key, None))
+        try:
+            content = await asyncio.shield(job)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except BrokenProcessPool:
+            # A worker died during this render; the next submit replaces the pool
+            raise HTTPException(status_code=503, detail="Render worker crashed, retry", headers={"Retry-After": "1"})
+        render_cache.set(key, content)
+    return Response(content=content, media_type="image/png", headers=headers)
+
 @app.get("/download-report")
-def download_report():
-    report_path = "final_report.pdf"
-    if not os.path.exists(report_path):
-        raise HTTPException(status_code=404, detail="Report not found")
-    return FileResponse(report_path, media_type='application/pdf', filename="Car_Price_Report.pdf")
+async def download_report(request: Request, wait: float = REPORT_WAIT_SECONDS):
+    # The report of the serving model and data. Cached reports are served straight from disk; otherwise
+    # the background build is awaited for up to `wait` seconds (0: answer 202 right away)
+    if bundle.model is None:
+        not_ready("Model")
+    key, path = current_report()
+    if not os.path.exists(path):
+        job = schedule_report()
+        if job is not None and wait > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(job), timeout=wait)
+            except Exception:
+                pass
+    if not os.path.exists(path):
+        if key not in report_errors:
+            return JSONResponse({"status": "generating", "model_version": bundle.version}, status_code=202,
+                                headers={"Retry-After": "2"})
+        # Generation failed (e.g. fpdf missing): fall back to a report built offline, marked as such,
+        # until a retry after REPORT_RETRY_SECONDS succeeds
+        if not os.path.exists(STATIC_REPORT_PATH):
+            raise HTTPException(status_code=500, detail=f"Report generation failed: {report_errors[key][0]}",
+                                headers={"Retry-After": str(int(REPORT_RETRY_SECONDS))})
+        return FileResponse(STATIC_REPORT_PATH, media_type='application/pdf', filename="Car_Price_Report.pdf",
+                            headers={"X-Report-Stale": "true"})
+
+    headers = {"ETag": f'"{key}"', "Cache-Control": "no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type='application/pdf', filename="Car_Price_Report.pdf", headers=headers)
 
 @app.post("/predict")
-def predict(features: CarFeatures):
-    if model is None:
-        raise HTTPException(status_code=500, detail="Model not loaded")
+async def predict(features: CarFeatures):
+    current = bundle
+    if current.model is None:
+        not_ready("Model")
     
-    # Convert pydantic model to dataframe with correct column names (matching the training data)
-    input_data = pd.DataFrame([{
-        'Brand': features.Brand,
-        'Year': features.Year,
-        'Engine Size': features.Engine_Size,
-        'Fuel Type': features.Fuel_Type,
-        'Transmission': features.Transmission,
-        'Mileage': features.Mileage,
-        'Condition': features.Condition,
-        'Model': features.Model
-    }])
+    # Request arrival -> handler: body parsing and pydantic validation
+    checkpoint('validation')
+    row = features_to_row(features)
+    key = prediction_cache_key(row, current.version)
+    checkpoint('features')
+    prediction = prediction_cache.get(key)
+    checkpoint('cache')
     
     try:
-        prediction = model.predict(input_data)[0]
-        return {"predicted_price": round(float(prediction), 2)}
+        if prediction is None:
+            if current.scorer is not None:
+                # A few dict lookups: cheaper inline than a hop through the batch queue
+                prediction = score_row(current.scorer, row)
+            else:
+                # Spans inside the batched model call are not attributed to this request; the wait
+                # for the batch window is part of this span
+                prediction = await predict_batcher.submit(row)
+            checkpoint('predict')
+            prediction = prediction_cache.set(key, float(prediction))
+        result = {"predicted_price": round(prediction, 2)}
+        intervals = prediction_intervals([row], [prediction], current.model)
+        checkpoint('intervals')
+        if intervals is not None:
+            result["interval"] = format_interval(intervals[0])
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/similar")
+def similar_listings(features: CarFeatures, k: int = 5):
+    # The k listings of the same brand and model closest in year, engine size and mileage
+    # (all models of the brand if the model is unknown), as evidence next to /predict
+    if similar_index is None:
+        not_ready("Data")
+    if not 1 <= k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    from similar_index import FEATURE_COLS as SIMILAR_FEATURE_COLS
+    row = features_to_row(features)
+    rows, distances = similar_index.query(row['Brand'], row['Model'], [row[col] for col in SIMILAR_FEATURE_COLS], k)
+    if len(rows) == 0:
+        raise HTTPException(status_code=404, detail=f"No listings for brand {row['Brand']}")
+    results = to_records(df_cleaned.iloc[rows])
+    for record, distance in zip(results, distances):
+        record['distance'] = round(float(distance), 4)
+    return {"count": len(results), "results": results}
+
+@app.post("/predict/batch")
+def predict_batch(rows: List[Any]):
+    if bundle.model is None:
+        not_ready("Model")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ROWS} rows")
+    return predict_batch_rows(rows)
+
+@app.post("/predict/batch/upload")
+async def predict_batch_upload(request: Request):
+    # Accepts a raw CSV (text/csv) or NDJSON (application/x-ndjson) body, one car per row/line
+    if bundle.model is None:
+        not_ready("Model")
+
+    content_type = request.headers.get('content-type', '')
+    body = (await request.body()).decode('utf-8-sig')
+    if 'csv' in content_type:
+        rows = list(csv.DictReader(io.StringIO(body)))
+        row_errors = {}
+    elif 'ndjson' in content_type or 'jsonl' in content_type:
+        rows, row_errors = parse_ndjson(body)
+    else:
+        raise HTTPException(status_code=415, detail="Upload must be text/csv or application/x-ndjson")
+
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ROWS} rows")
+    return await run_in_threadpool(predict_batch_rows, rows, row_errors)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
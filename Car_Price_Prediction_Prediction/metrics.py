@@ -0,0 +1,147 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+# Request instrumentation for the API, exported in the Prometheus text format.
+#
+# MetricsMiddleware times every request into a histogram per (method, route template, status).
+# Inside a request, checkpoint(name) records the time since the previous checkpoint (or since the
+# request arrived, for the first one) as span `name` of that route, so hot paths are split into
+# validation / features / preprocess / predict / ... with one perf_counter call per span. The time
+# between the handler's last checkpoint and the response start is recorded as span 'serialize'.
+# Observations are buffered on the request and folded into fixed-bucket histograms once per request.
+
+# Upper bounds in seconds, from 50us (a cached /predict) to 10s (a large batch upload)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # counts[i] observations fell in (buckets[i-1], buckets[i]]; the last slot is +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self, prefix='car_api', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (method, route, status) -> Histogram, and (route, span) -> Histogram
+        self.requests = {}
+        self.spans = {}
+        # name -> (help, callable returning {labels tuple: value}); read at scrape time
+        self.gauges = {}
+
+    def record(self, method, route, status, duration, spans):
+        with self._lock:
+            key = (method, route, status)
+            if key not in self.requests:
+                self.requests[key] = Histogram(self.buckets)
+            self.requests[key].observe(duration)
+            for name, seconds in spans:
+                key = (route, name)
+                if key not in self.spans:
+                    self.spans[key] = Histogram(self.buckets)
+                self.spans[key].observe(seconds)
+
+    def gauge(self, name, help_text, collect):
+        # collect() -> {(('label', 'value'), ...): number}
+        self.gauges[name] = (help_text, collect)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, f"{self.prefix}_request_duration_seconds",
+                                    "Request latency by route template", ('method', 'route', 'status'), self.requests)
+            self._render_histograms(lines, f"{self.prefix}_span_duration_seconds",
+                                    "Time spent in each hot-path span of a route", ('route', 'span'), self.spans)
+        for name, (help_text, collect) in sorted(self.gauges.items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in collect().items():
+                lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _render_histograms(self, lines, metric, help_text, label_names, histograms):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for key, histogram in sorted(histograms.items()):
+            labels = tuple(zip(label_names, key))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{metric}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class RequestTiming:
+    __slots__ = ('start', 'last', 'spans', 'active')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.spans = []
+        self.active = True
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+def checkpoint(name):
+    # Records the time since the previous checkpoint as span `name` of the current request. No-op
+    # outside a request or after it finished (e.g. in the micro-batcher's long-lived consumer task)
+    timing = _current.get()
+    if timing is None or not timing.active:
+        return
+    now = time.perf_counter()
+    timing.spans.append((name, now - timing.last))
+    timing.last = now
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (no BaseHTTPMiddleware task/stream overhead); requests that did not
+    # match a route are recorded as 'unmatched' so scanners cannot blow up the label cardinality
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                if timing.spans:
+                    timing.spans.append(('serialize', time.perf_counter() - timing.last))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.active = False
+            _current.reset(token)
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            self.registry.record(scope['method'], route, str(status[0]),
+                                 time.perf_counter() - timing.start, timing.spans)
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Pickle-free artifact for the linear price model. A directory holding:
+#   model.json                   intercept, column names, metadata and a SHA-256 per array file
+#   num.{mean,scale,coef}.npy    StandardScaler statistics and coefficients of the numerical columns
+#   cat<i>.{vocab,coef}.npy      one-hot vocabulary and coefficients of the i-th categorical column
+#   design.cov.npy               optional (X^T X)^+ of the training design [1, scaled numerics, one-hot],
+#                                which with the residual variance gives closed-form prediction intervals
+# Loading needs no scikit-learn, never executes code from the artifact (allow_pickle=False),
+# and memory-maps the arrays, so even large one-hot vocabularies load in milliseconds.
+
+MODEL_FILE = 'model.json'
+FORMAT_VERSION = 1
+# Above this many design columns the covariance matrix (features^2 floats) is not stored
+MAX_INTERVAL_FEATURES = 4096
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def interval_stats(xtx, residual_sum_of_squares, n_rows):
+    # Pseudo-inverse of the (rank deficient: one-hot blocks sum to the intercept) design Gram matrix
+    # and the unbiased residual variance, for intervals via pred +/- t * sqrt(s2 * (1 + x^T C x))
+    if len(xtx) > MAX_INTERVAL_FEATURES:
+        return None
+    rank = int(np.linalg.matrix_rank(xtx, hermitian=True))
+    dof = int(n_rows - rank)
+    if dof <= 0:
+        return None
+    return {
+        'covariance': np.linalg.pinv(xtx, hermitian=True),
+        'residual_variance': float(residual_sum_of_squares / dof),
+        'dof': dof
+    }
+
+def pipeline_interval_stats(model_pipeline, X, y):
+    # interval_stats of a fitted pipeline on its training data, in the artifact's design layout
+    from scipy import sparse
+    encoded = sparse.csr_matrix(model_pipeline.named_steps['preprocessor'].transform(X))
+    design = sparse.hstack([np.ones((encoded.shape[0], 1)), encoded]).tocsr()
+    residuals = np.asarray(y, dtype=np.float64) - model_pipeline.predict(X)
+    return interval_stats((design.T @ design).toarray(), float(residuals @ residuals), design.shape[0])
+
+def export_pipeline(model_pipeline, metadata, path, intervals=None):
+    # Writes the fitted StandardScaler + OneHotEncoder + linear regressor pipeline as an artifact
+    preprocessor = model_pipeline.named_steps['preprocessor']
+    regressor = model_pipeline.named_steps['regressor']
+    coef = np.ravel(regressor.coef_).astype(np.float64)
+
+    numerical = ([], np.zeros(0), np.ones(0), np.zeros(0))
+    categorical = []
+    offset = 0
+    for name, transformer, cols in preprocessor.transformers_:
+        if transformer == 'drop' or len(cols) == 0:
+            continue
+        if name == 'num':
+            numerical = (list(cols), transformer.mean_, transformer.scale_, coef[offset:offset + len(cols)])
+            offset += len(cols)
+        elif name == 'cat':
+            if getattr(transformer, 'drop_idx_', None) is not None:
+                raise ValueError("Artifact export only supports OneHotEncoder without dropped categories")
+            for i, col in enumerate(cols):
+                categories = transformer.categories_[i]
+                categorical.append((col, [str(c) for c in categories], coef[offset:offset + len(categories)]))
+                offset += len(categories)
+        else:
+            raise ValueError(f"Unsupported transformer in pipeline: {name}")
+    if offset != len(coef):
+        raise ValueError(f"Artifact covers {offset} features but the regressor has {len(coef)}")
+    save_artifact(path, float(np.ravel(regressor.intercept_)[0]), numerical, categorical, metadata, intervals)
+
+def save_artifact(path, intercept, numerical, categorical, metadata, intervals=None):
+    # numerical: (cols, means, scales, coefs); categorical: [(col, vocabulary, coefs)];
+    # intervals: optional interval_stats() result
+    numerical_cols, means, scales, num_coef = numerical
+    arrays = {
+        'num.mean': np.asarray(means, dtype=np.float64),
+        'num.scale': np.asarray(scales, dtype=np.float64),
+        'num.coef': np.asarray(num_coef, dtype=np.float64)
+    }
+    for i, (col, vocab, coefs) in enumerate(categorical):
+        arrays[f"cat{i}.vocab"] = np.asarray(vocab, dtype=np.str_)
+        arrays[f"cat{i}.coef"] = np.asarray(coefs, dtype=np.float64)
+    if intervals is not None:
+        arrays['design.cov'] = np.asarray(intervals['covariance'], dtype=np.float64)
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    checksums = {}
+    for key, values in arrays.items():
+        file_name = f"{key}.npy"
+        np.save(os.path.join(tmp_path, file_name), values, allow_pickle=False)
+        checksums[file_name] = _sha256(os.path.join(tmp_path, file_name))
+
+    spec = {
+        'format_version': FORMAT_VERSION,
+        'intercept': float(intercept),
+        'numerical_cols': list(numerical_cols),
+        'categorical_cols': [col for col, _, _ in categorical],
+        'metadata': _json_safe(metadata),
+        'checksums': checksums
+    }
+    if intervals is not None:
+        spec['intervals'] = {'residual_variance': intervals['residual_variance'], 'dof': intervals['dof']}
+    with open(os.path.join(tmp_path, MODEL_FILE), 'w') as f:
+        json.dump(spec, f, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+class LinearArtifact:
+    # Vectorized scorer over the exported arrays; a drop-in for model_pipeline.predict
+
+    def __init__(self, spec, arrays):
+        self.intercept = spec['intercept']
+        self.numerical_cols = spec['numerical_cols']
+        self.categorical_cols = spec['categorical_cols']
+        self.metadata = spec['metadata']
+        self.num_mean = arrays['num.mean']
+        self.num_scale = arrays['num.scale']
+        self.num_coef = arrays['num.coef']
+        self.vocabs = []
+        self.cat_coefs = []
+        for i in range(len(self.categorical_cols)):
+            self.vocabs.append(pd.Index(arrays[f"cat{i}.vocab"]))
+            # A trailing 0 is the contribution of categories unseen in training (index -1)
+            self.cat_coefs.append(np.append(arrays[f"cat{i}.coef"], 0.0))
+        # Design layout: intercept, numerical columns, then each categorical's one-hot block
+        self.cat_offsets = np.cumsum([1 + len(self.numerical_cols)] + [len(vocab) for vocab in self.vocabs])[:-1]
+        self.covariance = arrays.get('design.cov')
+        self.intervals = spec.get('intervals') if self.covariance is not None else None
+
+    def predict(self, X):
+        prediction = np.full(len(X), self.intercept)
+        if self.numerical_cols:
+            numeric = X[self.numerical_cols].to_numpy(dtype=np.float64)
+            prediction += ((numeric - self.num_mean) / self.num_scale) @ self.num_coef
+        for col, vocab, coefs in zip(self.categorical_cols, self.vocabs, self.cat_coefs):
+            prediction += coefs[vocab.get_indexer(X[col].astype(str))]
+        return prediction
+
+    def design_entries(self, rows):
+        # Nonzero positions and values of each row's design vector, one slot per input column
+        # (an unseen category gets value 0), from a list of row dicts in training column names
+        n_numeric = len(self.numerical_cols)
+        positions = np.zeros((len(rows), 1 + n_numeric + len(self.categorical_cols)), dtype=np.int64)
+        values = np.ones(positions.shape)
+        if n_numeric:
+            numeric = np.array([[row[col] for col in self.numerical_cols] for row in rows], dtype=np.float64)
+            positions[:, 1:1 + n_numeric] = np.arange(1, 1 + n_numeric)
+            values[:, 1:1 + n_numeric] = (numeric - self.num_mean) / self.num_scale
+        for i, (col, vocab) in enumerate(zip(self.categorical_cols, self.vocabs)):
+            codes = vocab.get_indexer([str(row[col]) for row in rows])
+            positions[:, 1 + n_numeric + i] = np.where(codes >= 0, self.cat_offsets[i] + codes, 0)
+            values[:, 1 + n_numeric + i] = codes >= 0
+        return positions, values
+
+    def interval_half_widths(self, rows, level=0.95):
+        # t * sqrt(s2 * (1 + x^T C x)) per row, vectorized: x^T C x only involves each row's few
+        # nonzero design entries, so it is a gather of a (slots x slots) block of C per row
+        if self.intervals is None:
+            return None
+        positions, values = self.design_entries(rows)
+        block = self.covariance[positions[:, :, None], positions[:, None, :]]
+        leverage = np.einsum('na,nab,nb->n', values, block, values)
+        variance = self.intervals['residual_variance'] * (1.0 + np.maximum(leverage, 0.0))
+        return t_quantile(level, self.intervals['dof']) * np.sqrt(variance)
+
+    def to_scorer(self):
+        # Same tables in the fast_scorer dict format used for single-row predictions
+        return {
+            'intercept': self.intercept,
+            'numerical': {
+                col: {'mean': float(self.num_mean[i]), 'scale': float(self.num_scale[i]), 'coef': float(self.num_coef[i])}
+                for i, col in enumerate(self.numerical_cols)
+            },
+            'categorical': {
+                col: dict(zip(vocab.tolist(), coefs[:-1].tolist()))
+                for col, vocab, coefs in zip(self.categorical_cols, self.vocabs, self.cat_coefs)
+            }
+        }
+
+@lru_cache(maxsize=32)
+def t_quantile(level, dof):
+    # Two-sided Student t critical value
+    from scipy.stats import t
+    return float(t.ppf(0.5 + level / 2.0, dof))
+
+def load_spec(path):
+    with open(os.path.join(path, MODEL_FILE)) as f:
+        spec = json.load(f)
+    if spec.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format: {spec.get('format_version')}")
+    return spec
+
+def load_artifact(path, verify=True, mmap=True):
+    spec = load_spec(path)
+    arrays = {}
+    for file_name, checksum in spec['checksums'].items():
+        file_path = os.path.join(path, file_name)
+        if verify and _sha256(file_path) != checksum:
+            raise ValueError(f"Checksum mismatch for {file_name} in model artifact {path}")
+        arrays[file_name[:-len('.npy')]] = np.load(file_path, mmap_mode='r' if mmap else None, allow_pickle=False)
+    return LinearArtifact(spec, arrays)
+
+def load_metadata(path):
+    return load_spec(path)['metadata']
+
+if __name__ == "__main__":
+    # Export an already trained pickled pipeline and check the artifact reproduces it
+    import pickle
+
+    with open('model_pipeline.pkl', 'rb') as f:
+        model_pipeline = pickle.load(f)
+    with open('metadata.pkl', 'rb') as f:
+        metadata = pickle.load(f)
+    # Interval statistics on the same training split model_utils uses
+    from sklearn.model_selection import train_test_split
+    df = pd.read_csv('cleaned_car_price_data_logical.csv')
+    X = df.drop('Price', axis=1)
+    X_train, _, y_train, _ = train_test_split(X, df['Price'], test_size=0.2, random_state=42)
+    export_pipeline(model_pipeline, metadata, 'model_artifact',
+                    pipeline_interval_stats(model_pipeline, X_train, y_train))
+
+    max_error = np.max(np.abs(load_artifact('model_artifact').predict(X) - model_pipeline.predict(X)))
+    print(f"Model artifact saved to model_artifact (max abs difference to the pipeline: {max_error:.3e})")
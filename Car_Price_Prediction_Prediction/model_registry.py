@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+
+from fast_scorer import load_scorer, score_row
+
+# Versioned model artifacts: models/<version>/ holds a copy of every artifact plus a manifest with
+# SHA-256 checksums, and models/ACTIVE names the version the API should serve. Both the version
+# directories and the ACTIVE pointer are written to a temporary path and renamed into place, so
+# a server polling the registry never sees a half-written model.
+#
+# A version is served from its pickle-free model_artifact/ directory when it has one; the pickled
+# pipeline is only loaded for versions registered before the artifact format existed.
+# numpy/pandas are imported on first load, so the API can import this module at no cost.
+
+REGISTRY_DIR = 'models'
+ACTIVE_FILE = 'ACTIVE'
+MANIFEST_FILE = 'manifest.json'
+ARTIFACT_DIR = 'model_artifact'
+ARTIFACT_FILES = ['model_pipeline.pkl', 'metadata.pkl', 'fast_scorer.json', ARTIFACT_DIR]
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def artifact_paths(source_dir, files=ARTIFACT_FILES):
+    # Existing artifact files relative to source_dir, with artifact directories expanded
+    paths = []
+    for name in files:
+        full_path = os.path.join(source_dir, name)
+        if os.path.isdir(full_path):
+            paths.extend(os.path.join(name, child) for child in sorted(os.listdir(full_path)))
+        elif os.path.exists(full_path):
+            paths.append(name)
+    return paths
+
+def version_dir(version, registry_dir=REGISTRY_DIR):
+    if not version or os.path.basename(version) != version or version in ('.', '..'):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return os.path.join(registry_dir, version)
+
+def register_model(source_dir='.', registry_dir=REGISTRY_DIR, files=ARTIFACT_FILES, activate=True):
+    checksums = {name: file_sha256(os.path.join(source_dir, name)) for name in artifact_paths(source_dir, files)}
+    if 'model_pipeline.pkl' not in checksums and os.path.join(ARTIFACT_DIR, 'model.json') not in checksums:
+        raise FileNotFoundError(f"No model artifact or model_pipeline.pkl in {source_dir}")
+    content_hash = hashlib.sha256(json.dumps(checksums, sort_keys=True).encode('utf-8')).hexdigest()
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{content_hash[:8]}"
+
+    tmp_dir = version_dir(f".{version}.tmp", registry_dir)
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in checksums:
+        os.makedirs(os.path.dirname(os.path.join(tmp_dir, name)), exist_ok=True)
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+    manifest = {
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'files': {name: {'sha256': checksum, 'size': os.path.getsize(os.path.join(tmp_dir, name))}
+                  for name, checksum in checksums.items()}
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_dir, version_dir(version, registry_dir))
+
+    if activate:
+        set_active_version(version, registry_dir)
+    return version
+
+def publish_model(source_dir='.', registry_dir=REGISTRY_DIR, files=ARTIFACT_FILES):
+    # Activates the (newest) version holding exactly the artifacts in source_dir, registering them
+    # only if no version does. Idempotent, so it can follow every training run, cached or not
+    checksums = {name: file_sha256(os.path.join(source_dir, name)) for name in artifact_paths(source_dir, files)}
+    for manifest in reversed(list_versions(registry_dir)):
+        if {name: info['sha256'] for name, info in manifest['files'].items()} == checksums:
+            if active_version(registry_dir) != manifest['version']:
+                set_active_version(manifest['version'], registry_dir)
+            return manifest['version']
+    return register_model(source_dir, registry_dir, files)
+
+def verify_version(version, registry_dir=REGISTRY_DIR):
+    path = version_dir(version, registry_dir)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    for name, info in manifest['files'].items():
+        if file_sha256(os.path.join(path, name)) != info['sha256']:
+            raise ValueError(f"Checksum mismatch for {name} in model version {version}")
+    return manifest
+
+def set_active_version(version, registry_dir=REGISTRY_DIR):
+    verify_version(version, registry_dir)
+    tmp_path = os.path.join(registry_dir, f".{ACTIVE_FILE}.{os.getpid()}")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(registry_dir, ACTIVE_FILE))
+
+def active_version(registry_dir=REGISTRY_DIR):
+    try:
+        with open(os.path.join(registry_dir, ACTIVE_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    manifests = []
+    if not os.path.isdir(registry_dir):
+        return manifests
+    for name in sorted(os.listdir(registry_dir)):
+        manifest_path = os.path.join(registry_dir, name, MANIFEST_FILE)
+        if not name.startswith('.') and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+class ModelBundle:
+    # Everything the API serves from one model version; swapped as a single reference
+    def __init__(self, version=None, model=None, metadata=None, scorer=None):
+        self.version = version
+        self.model = model
+        self.metadata = metadata if metadata is not None else {}
+        self.scorer = scorer
+
+def load_bundle(version=None, registry_dir=REGISTRY_DIR, use_scorer=True, allow_pickle=True):
+    # Loads the given (default: active) registry version after verifying its checksums.
+    # Without a registry, falls back to the artifacts in the working directory.
+    if version is None:
+        version = active_version(registry_dir)
+    if version is None:
+        path = '.'
+        checksums = {name: file_sha256(name) for name in artifact_paths(path)}
+        version = 'local-' + hashlib.sha256(json.dumps(checksums, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+    else:
+        verify_version(version, registry_dir)
+        path = version_dir(version, registry_dir)
+
+    artifact_path = os.path.join(path, ARTIFACT_DIR)
+    if os.path.exists(os.path.join(artifact_path, 'model.json')):
+        from model_artifact import load_artifact, load_metadata
+        # The artifact verifies its own array checksums, so this also covers the local fallback
+        model = load_artifact(artifact_path)
+        return ModelBundle(version, model, load_metadata(artifact_path), model.to_scorer() if use_scorer else None)
+    if not allow_pickle:
+        raise FileNotFoundError(f"Model version {version} has no {ARTIFACT_DIR} and pickle loading is disabled")
+
+    with open(os.path.join(path, 'model_pipeline.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    with open(os.path.join(path, 'metadata.pkl'), 'rb') as f:
+        metadata = pickle.load(f)
+    scorer = None
+    scorer_path = os.path.join(path, 'fast_scorer.json')
+    if use_scorer and os.path.exists(scorer_path):
+        scorer = load_scorer(scorer_path)
+    return ModelBundle(version, model, metadata, scorer)
+
+def warm_bundle(bundle, sample):
+    # Runs the new model once before it takes traffic, and refuses a scorer that disagrees with it
+    if len(sample) == 0:
+        return
+    import pandas as pd
+    X = pd.DataFrame(sample).drop(columns=['Price'], errors='ignore')
+    # Requests arrive as Python floats; score the (possibly float32) sample the same way
+    X = X.astype({col: 'float64' for col, dtype in X.dtypes.items() if pd.api.types.is_float_dtype(dtype)})
+    expected = bundle.model.predict(X)
+    if bundle.scorer is not None:
+        for row, value in zip(X.to_dict(orient='records'), expected):
+            if abs(score_row(bundle.scorer, row) - value) > 1e-6 * max(abs(value), 1.0):
+                raise ValueError(f"Fast scorer of model version {bundle.version} disagrees with its pipeline")
+
+if __name__ == "__main__":
+    # python model_registry.py register | list | activate <version> | verify <version>
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'register':
+        print(f"Registered and activated model version {register_model()}")
+    elif command == 'list':
+        current = active_version()
+        for manifest in list_versions():
+            marker = '*' if manifest['version'] == current else ' '
+            print(f"{marker} {manifest['version']}  {manifest['created_at']}")
+    elif command in ('activate', 'verify') and len(sys.argv) == 3:
+        if command == 'activate':
+            set_active_version(sys.argv[2])
+            print(f"Active model version: {sys.argv[2]}")
+        else:
+            verify_version(sys.argv[2])
+            print(f"Model version {sys.argv[2]} verified")
+    else:
+        print("Usage: python model_registry.py register | list | activate <version> | verify <version>")
+        sys.exit(1)
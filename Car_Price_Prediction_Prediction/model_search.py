@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# K-fold cross-validated grid search over alternative regressors.
+# The preprocessor is fitted once per fold and its transformed matrices are shipped to each worker
+# once (pool initializer); a task is then a single (candidate, fold) regressor fit.
+# Only linear candidates are servable: the fast scorer and model artifact store coefficients, so
+# gradient boosting is scored for comparison but never selected.
+
+RANDOM_STATE = 42
+
+CANDIDATES = {
+    'linear': (LinearRegression, [{}], True),
+    'ridge': (Ridge, [{'alpha': a} for a in (0.1, 1.0, 10.0, 100.0)], True),
+    'lasso': (Lasso, [{'alpha': a, 'max_iter': 10000} for a in (0.1, 1.0, 10.0, 100.0)], True),
+    'gradient_boosting': (GradientBoostingRegressor,
+                          [{'n_estimators': n, 'max_depth': d, 'learning_rate': 0.1, 'random_state': RANDOM_STATE}
+                           for n in (100, 300) for d in (2, 3)], False)
+}
+
+def build_preprocessor(numerical_cols, categorical_cols):
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), numerical_cols),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_cols)
+        ])
+
+def candidate_grid(candidates=CANDIDATES):
+    return [(name, params) for name, (_, grid, _) in candidates.items() for params in grid]
+
+def make_estimator(name, params):
+    return CANDIDATES[name][0](**params)
+
+def prepare_folds(X, y, preprocessor, n_folds=5):
+    # Fitted preprocessor output per fold: (X_train, y_train, X_val, y_val)
+    folds = []
+    for train_idx, val_idx in KFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE).split(X):
+        fold_preprocessor = clone(preprocessor)
+        X_train = fold_preprocessor.fit_transform(X.iloc[train_idx])
+        X_val = fold_preprocessor.transform(X.iloc[val_idx])
+        folds.append((X_train, y.iloc[train_idx].to_numpy(), X_val, y.iloc[val_idx].to_numpy()))
+    return folds
+
+_folds = None
+
+def init_worker(folds):
+    global _folds
+    _folds = folds
+
+def fit_task(name, params, fold_index):
+    X_train, y_train, X_val, y_val = _folds[fold_index]
+    estimator = make_estimator(name, params)
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    y_pred = estimator.predict(X_val)
+    return fit_time, r2_score(y_val, y_pred), mean_squared_error(y_val, y_pred)
+
+def cross_validate_candidates(X, y, preprocessor, n_folds=5, workers=None):
+    folds = prepare_folds(X, y, preprocessor, n_folds)
+    tasks = [(name, params, fold_index) for name, params in candidate_grid() for fold_index in range(n_folds)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        init_worker(folds)
+        results = [fit_task(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(folds,)) as pool:
+            results = list(pool.map(fit_task, *zip(*tasks)))
+
+    candidates = []
+    for i, (name, params) in enumerate(candidate_grid()):
+        fit_times, r2s, mses = (np.array(values) for values in zip(*results[i * n_folds:(i + 1) * n_folds]))
+        candidates.append({
+            'name': name,
+            'params': params,
+            'servable': CANDIDATES[name][2],
+            'mean_r2': float(r2s.mean()),
+            'std_r2': float(r2s.std()),
+            'mean_mse': float(mses.mean()),
+            'std_mse': float(mses.std()),
+            'mean_fit_time_s': float(fit_times.mean()),
+            'fold_r2': r2s.tolist(),
+            'fold_mse': mses.tolist()
+        })
+    return candidates
+
+def select_candidate(candidates):
+    # Lowest mean CV MSE among the servable candidates
+    return min((c for c in candidates if c['servable']), key=lambda c: c['mean_mse'])
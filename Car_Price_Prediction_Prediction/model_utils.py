@@ -1,41 +1,59 @@
-import pandas as pd
 import numpy as np
 import pickle
+import argparse
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score
+from fast_scorer import compile_scorer, check_parity, save_scorer
+from data_store import read_table, iter_table
+from model_artifact import export_pipeline, load_artifact, pipeline_interval_stats
+from model_registry import ARTIFACT_DIR, register_model
+from incremental_stats import IncrementalStats, CATEGORICAL_COLS, NUMERICAL_COLS, TARGET_COL
+from model_search import build_preprocessor, cross_validate_candidates, make_estimator, select_candidate
 
-def train_and_save_model(data_path, model_output, preprocessor_output):
-    # Load cleaned data
-    df = pd.read_csv(data_path)
+# Rows scored both ways when checking the compiled scorer against the pipeline after training
+PARITY_SAMPLE_ROWS = 2000
+
+def train_and_save_model(data_path, model_output, preprocessor_output, search=False, n_folds=5, workers=None,
+                         register=True):
+    # Load cleaned data (columnar dataset, or a CSV import)
+    df = read_table(data_path)
     
     # Define features and target
     X = df.drop('Price', axis=1)
     y = df['Price']
     
     # Identify categorical and numerical columns
-    categorical_cols = X.select_dtypes(include=['object', 'str']).columns.tolist()
-    numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    categorical_cols = X.select_dtypes(include=['object', 'str', 'category']).columns.tolist()
+    numerical_cols = X.select_dtypes(include=['number']).columns.tolist()
     
     # Create preprocessing pipeline
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', StandardScaler(), numerical_cols),
-            ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_cols)
-        ])
+    preprocessor = build_preprocessor(numerical_cols, categorical_cols)
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    # Optionally pick the regressor by k-fold CV over the candidate grid (training split only)
+    regressor = LinearRegression()
+    cv_results = None
+    if search:
+        candidates = cross_validate_candidates(X_train, y_train, preprocessor, n_folds, workers)
+        selected = select_candidate(candidates)
+        for candidate in sorted(candidates, key=lambda c: c['mean_mse']):
+            print(f"{candidate['name']:>18} {str(candidate['params']):<70} "
+                  f"R2 {candidate['mean_r2']:.4f} +/- {candidate['std_r2']:.4f}  fit {candidate['mean_fit_time_s']:.3f}s")
+        print(f"Selected {selected['name']} {selected['params']}")
+        regressor = make_estimator(selected['name'], selected['params'])
+        cv_results = {'folds': n_folds, 'selected': {'name': selected['name'], 'params': selected['params']},
+                      'candidates': candidates}
     
     # Create the full pipeline with model
     model_pipeline = Pipeline(steps=[
         ('preprocessor', preprocessor),
-        ('regressor', LinearRegression())
+        ('regressor', regressor)
     ])
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
     # Train model
     model_pipeline.fit(X_train, y_train)
     
@@ -53,21 +71,104 @@ def train_and_save_model(data_path, model_output, preprocessor_output):
     
     print(f"Model pipeline saved to {model_output}")
     
+    # Export the compiled single-row scorer used by the API fast path, verified on a fixed sample
+    # (scoring row by row in Python; `python fast_scorer.py` checks the whole dataset)
+    scorer = compile_scorer(model_pipeline)
+    max_error = check_parity(scorer, model_pipeline, X, sample=PARITY_SAMPLE_ROWS)
+    save_scorer(scorer, 'fast_scorer.json')
+    print(f"Fast scorer saved to fast_scorer.json (max relative error {max_error:.3e})")
+    
     # Also save metadata for EDA endpoints
     metadata = {
         'categorical_cols': categorical_cols,
         'numerical_cols': numerical_cols,
-        'brands': df['Brand'].unique().tolist(),
-        'fuel_types': df['Fuel Type'].unique().tolist(),
-        'transmissions': df['Transmission'].unique().tolist(),
-        'conditions': df['Condition'].unique().tolist(),
-        'models': df['Model'].unique().tolist(),
+        'brands': [str(v) for v in df['Brand'].unique()],
+        'fuel_types': [str(v) for v in df['Fuel Type'].unique()],
+        'transmissions': [str(v) for v in df['Transmission'].unique()],
+        'conditions': [str(v) for v in df['Condition'].unique()],
+        'models': [str(v) for v in df['Model'].unique()],
         'mse': mse,
         'r2': r2
     }
+    if cv_results is not None:
+        metadata['cv'] = cv_results
     with open('metadata.pkl', 'wb') as f:
         pickle.dump(metadata, f)
     print("Metadata saved to metadata.pkl")
+    
+    # Pickle-free artifact (arrays + JSON metadata) that the API loads instead of the pickles. For
+    # ordinary least squares it also carries (X^T X)^+ and the residual variance of the training
+    # design, from which the API computes prediction intervals in closed form
+    intervals = None
+    if isinstance(regressor, LinearRegression):
+        intervals = pipeline_interval_stats(model_pipeline, X_train, y_train)
+    export_pipeline(model_pipeline, metadata, 'model_artifact', intervals)
+    print("Model artifact saved to model_artifact")
+    
+    # Publish the artifacts as a new registry version; running servers pick it up on reload. The
+    # pipeline registers after the (possibly cached) stage instead, see pipeline.STAGES['train']
+    if register:
+        version = register_model()
+        print(f"Model version {version} registered and activated")
+
+def train_streaming(data_path, chunksize=100000, holdout_every=5):
+    # Out-of-core training: one pass over the dataset in chunks, accumulating the encoder vocabulary,
+    # scaler moments and normal equations (IncrementalStats), so peak memory depends on the chunk size
+    # and vocabulary, not the row count. Every `holdout_every`-th row goes to a holdout store that
+    # is scored exactly from its own sufficient statistics.
+    stats = IncrementalStats()
+    holdout = IncrementalStats()
+    offset = 0
+    for chunk in iter_table(data_path, chunksize, columns=CATEGORICAL_COLS + NUMERICAL_COLS + [TARGET_COL]):
+        is_holdout = np.arange(offset, offset + len(chunk)) % holdout_every == 0
+        offset += len(chunk)
+        stats.ingest(chunk[~is_holdout])
+        holdout.ingest(chunk[is_holdout])
+    print(f"Streamed {offset} rows ({stats.n_rows} training, {holdout.n_rows} holdout) in chunks of {chunksize}")
+    
+    mse, r2 = holdout.evaluate(stats)
+    print(f"Mean Squared Error: {mse}")
+    print(f"R-squared Score: {r2}")
+    
+    def values(col):
+        # Distinct values over both stores, in first-seen order
+        return list(dict.fromkeys(list(stats.feature_index[col]) + list(holdout.feature_index[col])))
+    
+    metadata = {
+        'categorical_cols': CATEGORICAL_COLS,
+        'numerical_cols': NUMERICAL_COLS,
+        'brands': values('Brand'),
+        'fuel_types': values('Fuel Type'),
+        'transmissions': values('Transmission'),
+        'conditions': values('Condition'),
+        'models': values('Model'),
+        'mse': mse,
+        'r2': r2,
+        'training': {'mode': 'streaming', 'rows': offset, 'chunksize': chunksize, 'holdout_every': holdout_every}
+    }
+    stats.to_artifact(ARTIFACT_DIR, metadata)
+    print(f"Model artifact saved to {ARTIFACT_DIR}")
+    save_scorer(load_artifact(ARTIFACT_DIR).to_scorer(), 'fast_scorer.json')
+    with open('metadata.pkl', 'wb') as f:
+        pickle.dump(metadata, f)
+    
+    # No pipeline pickle is produced, so only the artifacts written here are registered
+    version = register_model(files=['metadata.pkl', 'fast_scorer.json', ARTIFACT_DIR])
+    print(f"Model version {version} registered and activated")
 
 if __name__ == "__main__":
-    train_and_save_model('cleaned_car_price_data_logical.csv', 'model_pipeline.pkl', 'preprocessor.pkl')
+    parser = argparse.ArgumentParser(description="Train the price model and publish it to the registry")
+    parser.add_argument('--search', action='store_true',
+                        help="Select the regressor by k-fold CV over Ridge/Lasso/gradient boosting candidates")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="CV worker processes (default: all cores)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Out-of-core training in one chunked pass (for datasets larger than RAM)")
+    parser.add_argument('--data', default='cleaned_car_price_data_logical.cols')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    args = parser.parse_args()
+    if args.streaming:
+        train_streaming(args.data, args.chunksize)
+    else:
+        train_and_save_model(args.data, 'model_pipeline.pkl', 'preprocessor.pkl',
+                             search=args.search, n_folds=args.folds, workers=args.workers)
@@ -1,35 +1,17 @@
-import pandas as pd
-import numpy as np
+from data_store import save_dataset
+from cleaning import clean_table, logical_price
 
-def solve_accuracy_issue(input_path, output_path):
-    df = pd.read_csv(input_path)
+def solve_accuracy_issue(input_path, output_path, csv_export_path=None, seed=None):
+    # Replace Price with the logical price, then clip and drop 3-sigma outliers
+    df = clean_table(input_path, synthesize_price=True, outlier_sigma=3.0, seed=seed)
     
-    # Let's create a 'Logical Price' based on real car valuation logic
-    # Base Price around 30k
-    # + $2000 for every year after 2000
-    # + $5000 if Condition is 'New'
-    # - $0.1 for every mile driven
-    # + $3000 for Engine Size
+    save_dataset(df, output_path)
+    print(f"Logical dataset created: {output_path} ({len(df)} rows)")
     
-    # Basic logic
-    df['Price'] = 30000 + (df['Year'] - 2000) * 1500 + (df['Engine Size'] * 3000) - (df['Mileage'] * 0.1)
-    
-    # Categorical logic boosters
-    df.loc[df['Condition'] == 'New', 'Price'] += 8000
-    df.loc[df['Condition'] == 'Like New', 'Price'] += 4000
-    df.loc[df['Brand'] == 'Mercedes', 'Price'] += 5000
-    df.loc[df['Brand'] == 'Tesla', 'Price'] += 6000
-    
-    # Add a decent amount of random noise (gaussian) to keep it realistic
-    # Increasing sigma to 5000 so R-squared is not 100%
-    noise = np.random.normal(0, 5000, df.shape[0])
-    df['Price'] = df['Price'] + noise
-    
-    # Ensure no negative prices
-    df['Price'] = df['Price'].apply(lambda x: max(x, 1000))
-    
-    df.to_csv(output_path, index=False)
-    print(f"Logical dataset created: {output_path}")
+    # CSV export for the notebook and external tools
+    if csv_export_path:
+        df.to_csv(csv_export_path, index=False)
+        print(f"CSV export written: {csv_export_path}")
 
 if __name__ == "__main__":
-    solve_accuracy_issue('cleaned_car_price_data.csv', 'cleaned_car_price_data_logical.csv')
+    solve_accuracy_issue('cleaned_car_price_data.cols', 'cleaned_car_price_data_logical.cols', 'cleaned_car_price_data_logical.csv')
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Runs the data -> model -> report stages as a DAG with a content-addressed cache.
+#
+# A stage's key is the SHA-256 of its name, arguments, code files and input files. After a stage
+# runs, each output file is stored once under .pipeline_cache/blobs/<sha256> and the key maps to
+# the output manifest. A later run with the same key skips the stage when the outputs on disk
+# still match the manifest, or restores them from the blobs when they were changed or deleted.
+# Stages whose dependencies are done run concurrently in a process pool (plots vs. training).
+
+CACHE_DIR = '.pipeline_cache'
+# Seed of the synthesized logical price, so a rerun reproduces the same data (and downstream keys)
+PIPELINE_SEED = 42
+
+# name: function ('module:function') with args (and optional kwargs), upstream stages, inputs, code
+# files and outputs; args and kwargs are part of the stage key. 'after' is run in this process once
+# the stage is up to date, whether it ran, was cached or restored, for side effects outside the
+# cached outputs (the train stage's registry version has to match the restored artifacts)
+STAGES = {
+    'prepare': {
+        'run': 'prepare_data:prepare_data',
+        'args': ['car_price_prediction_.csv', 'cleaned_car_price_data.cols'],
+        'deps': [],
+        'inputs': ['car_price_prediction_.csv'],
+        'code': ['prepare_data.py', 'cleaning.py', 'data_store.py'],
+        'outputs': ['cleaned_car_price_data.cols']
+    },
+    'plots': {
+        'run': 'prepare_data:render_plots',
+        'args': ['cleaned_car_price_data.cols', 'plots'],
+        'deps': ['prepare'],
+        'inputs': ['cleaned_car_price_data.cols'],
+        'code': ['prepare_data.py', 'plot_service.py', 'data_store.py'],
+        'outputs': ['plots']
+    },
+    'logical_price': {
+        'run': 'optimize_data:solve_accuracy_issue',
+        'args': ['cleaned_car_price_data.cols', 'cleaned_car_price_data_logical.cols', 'cleaned_car_price_data_logical.csv'],
+        'kwargs': {'seed': PIPELINE_SEED},
+        'deps': ['prepare'],
+        'inputs': ['cleaned_car_price_data.cols'],
+        'code': ['optimize_data.py', 'cleaning.py', 'data_store.py'],
+        'outputs': ['cleaned_car_price_data_logical.cols', 'cleaned_car_price_data_logical.csv']
+    },
+    'train': {
+        'run': 'model_utils:train_and_save_model',
+        'args': ['cleaned_car_price_data_logical.cols', 'model_pipeline.pkl', 'preprocessor.pkl'],
+        'kwargs': {'register': False},
+        'after': 'model_registry:publish_model',
+        'deps': ['logical_price'],
+        'inputs': ['cleaned_car_price_data_logical.cols'],
+        'code': ['model_utils.py', 'model_search.py', 'model_artifact.py', 'model_registry.py', 'fast_scorer.py',
+                 'incremental_stats.py', 'data_store.py'],
+        'outputs': ['model_pipeline.pkl', 'metadata.pkl', 'fast_scorer.json', 'model_artifact']
+    },
+    'report': {
+        'run': 'generate_report:generate_report',
+        'args': [],
+        'deps': ['train', 'plots'],
+        'inputs': ['model_artifact', 'metadata.pkl', 'plots'],
+        'code': ['generate_report.py', 'model_artifact.py'],
+        'outputs': ['final_report.pdf']
+    }
+}
+
+def list_files(path):
+    # Files under path (a file or a directory), relative to the working directory, in stable order
+    if os.path.isdir(path):
+        return sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    return [path] if os.path.exists(path) else []
+
+class StageCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.key_dir = os.path.join(cache_dir, 'keys')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.key_dir, exist_ok=True)
+        # (path, mtime_ns, size) -> sha256, so unchanged large files are not rehashed on every run
+        self.index_path = os.path.join(cache_dir, 'hash_index.json')
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.used = set()
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        index_key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+        if index_key not in self.index:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            self.index[index_key] = digest.hexdigest()
+        self.used.add(index_key)
+        return self.index[index_key]
+
+    def tree_hashes(self, paths):
+        hashes = {}
+        for path in paths:
+            files = list_files(path)
+            if not files:
+                raise FileNotFoundError(f"Missing pipeline input: {path}")
+            hashes.update({name: self.file_hash(name) for name in files})
+        return hashes
+
+    def stage_key(self, name, stage):
+        payload = {
+            'stage': name,
+            'run': stage['run'],
+            'args': stage['args'],
+            'kwargs': stage.get('kwargs', {}),
+            'code': self.tree_hashes(stage['code']),
+            'inputs': self.tree_hashes(stage['inputs'])
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        try:
+            with open(os.path.join(self.key_dir, f"{key}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def outputs_match(self, manifest):
+        for output, files in manifest.items():
+            on_disk = list_files(output)
+            if sorted(on_disk) != sorted(files):
+                return False
+            if any(self.file_hash(name) != checksum for name, checksum in files.items()):
+                return False
+        return True
+
+    def restore(self, manifest):
+        for output, files in manifest.items():
+            if os.path.isdir(output):
+                shutil.rmtree(output)
+            for name, checksum in files.items():
+                os.makedirs(os.path.dirname(name) or '.', exist_ok=True)
+                shutil.copy2(os.path.join(self.blob_dir, checksum), name)
+
+    def store(self, key, outputs):
+        manifest = {}
+        for output in outputs:
+            files = {name: self.file_hash(name) for name in list_files(output)}
+            for name, checksum in files.items():
+                blob = os.path.join(self.blob_dir, checksum)
+                if not os.path.exists(blob):
+                    shutil.copy2(name, f"{blob}.tmp")
+                    os.replace(f"{blob}.tmp", blob)
+            manifest[output] = files
+        with open(os.path.join(self.key_dir, f"{key}.json"), 'w') as f:
+            json.dump(manifest, f, indent=1)
+        return manifest
+
+    def save_index(self):
+        # Only entries seen in this run are kept, so stale (path, mtime) pairs do not accumulate
+        with open(self.index_path, 'w') as f:
+            json.dump({key: value for key, value in self.index.items() if key in self.used}, f)
+
+def run_stage(run, args, kwargs=None):
+    module_name, function_name = run.split(':')
+    start = time.perf_counter()
+    getattr(importlib.import_module(module_name), function_name)(*args, **(kwargs or {}))
+    return time.perf_counter() - start
+
+def run_after(name, stage):
+    if stage.get('after'):
+        module_name, function_name = stage['after'].split(':')
+        result = getattr(importlib.import_module(module_name), function_name)()
+        print(f"[{name}] {stage['after']} -> {result}")
+
+def stages_for(targets, stages=STAGES):
+    # The targets plus everything upstream of them
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in stages:
+            raise KeyError(f"Unknown stage: {name}")
+        if name not in selected:
+            selected.add(name)
+            pending.extend(stages[name]['deps'])
+    return selected
+
+def run_pipeline(targets=None, force=False, workers=None, stages=STAGES, cache_dir=CACHE_DIR):
+    selected = stages_for(targets or list(stages), stages)
+    cache = StageCache(cache_dir)
+    done = set()
+    running = {}
+    results = {}
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            while len(done) < len(selected):
+                for name in sorted(selected - done - {name for name, _ in running.values()}):
+                    stage = stages[name]
+                    if not all(dep in done for dep in stage['deps']):
+                        continue
+                    # Inputs are produced by upstream stages, so the key is computed only once they are done
+                    key = cache.stage_key(name, stage)
+                    manifest = None if force else cache.lookup(key)
+                    if manifest is not None:
+                        if cache.outputs_match(manifest):
+                            results[name] = 'cached'
+                        else:
+                            cache.restore(manifest)
+                            results[name] = 'restored'
+                        print(f"[{name}] {results[name]} ({key[:12]})")
+                        run_after(name, stage)
+                        done.add(name)
+                        continue
+                    print(f"[{name}] running")
+                    running[pool.submit(run_stage, stage['run'], stage['args'], stage.get('kwargs'))] = (name, key)
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, key = running.pop(future)
+                    elapsed = future.result()
+                    cache.store(key, stages[name]['outputs'])
+                    results[name] = f"ran in {elapsed:.2f}s"
+                    print(f"[{name}] {results[name]}")
+                    run_after(name, stages[name])
+                    done.add(name)
+    finally:
+        cache.save_index()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the data -> model -> report pipeline with stage caching")
+    parser.add_argument('targets', nargs='*', help=f"Stages to bring up to date (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--force', action='store_true', help="Rerun the selected stages even when cached")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    run_pipeline(args.targets, force=args.force, workers=args.workers)
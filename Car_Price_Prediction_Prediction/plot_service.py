@@ -0,0 +1,95 @@
+import io
+import os
+
+import numpy as np
+
+# Renders the EDA figures (the same ones prepare_data.py writes to plots/) for an optional filter.
+# The API runs render_task in a process pool whose workers each memory-map the serving dataset once,
+# so a render only ships the filter in and PNG bytes out.
+
+PLOT_NAMES = ['price_dist', 'price_by_brand', 'price_vs_year', 'price_vs_mileage', 'correlation_matrix']
+
+# Scatter plots above this many points are drawn from a fixed-seed random sample
+MAX_SCATTER_POINTS = 20000
+
+_worker_df = None
+
+def filter_frame(df, brand=None, year_min=None, year_max=None, condition=None):
+    mask = np.ones(len(df), dtype=bool)
+    if brand is not None:
+        mask &= (df['Brand'] == brand).to_numpy()
+    if condition is not None:
+        mask &= (df['Condition'] == condition).to_numpy()
+    if year_min is not None:
+        mask &= (df['Year'] >= year_min).to_numpy()
+    if year_max is not None:
+        mask &= (df['Year'] <= year_max).to_numpy()
+    return df if mask.all() else df[mask]
+
+def downsample(df, max_points=MAX_SCATTER_POINTS):
+    if len(df) <= max_points:
+        return df
+    return df.sample(n=max_points, random_state=0)
+
+def draw_plot(df, plot_name, max_points=MAX_SCATTER_POINTS):
+    # Returns the matplotlib figure for plot_name; the caller saves and closes it
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if plot_name == 'price_dist':
+        fig = plt.figure(figsize=(10, 6))
+        # The histogram is cheap at any size, the KDE is not: estimate it on a sample
+        sns.histplot(df['Price'], kde=len(df) <= max_points)
+        plt.title('Price Distribution')
+    elif plot_name == 'price_by_brand':
+        fig = plt.figure(figsize=(12, 6))
+        sns.boxplot(x='Brand', y='Price', data=df)
+        plt.title('Price by Brand')
+        plt.xticks(rotation=45)
+    elif plot_name == 'price_vs_year':
+        fig = plt.figure(figsize=(10, 6))
+        sns.scatterplot(x='Year', y='Price', data=downsample(df, max_points))
+        plt.title('Price vs Year')
+    elif plot_name == 'price_vs_mileage':
+        fig = plt.figure(figsize=(10, 6))
+        sns.scatterplot(x='Mileage', y='Price', data=downsample(df, max_points))
+        plt.title('Price vs Mileage')
+    elif plot_name == 'correlation_matrix':
+        # Correlation Matrix for numeric features
+        fig = plt.figure(figsize=(10, 8))
+        numeric_df = df.select_dtypes(include=[np.number])
+        sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm')
+        plt.title('Correlation Matrix')
+    else:
+        raise ValueError(f"Unknown plot: {plot_name}")
+    return fig
+
+def render_plot(df, plot_name, max_points=MAX_SCATTER_POINTS):
+    import matplotlib.pyplot as plt
+
+    fig = draw_plot(df, plot_name, max_points)
+    output = io.BytesIO()
+    fig.savefig(output, format='png')
+    plt.close(fig)
+    return output.getvalue()
+
+def save_plots(df, plots_dir='plots'):
+    # Writes every EDA figure to plots_dir/<name>.png
+    os.makedirs(plots_dir, exist_ok=True)
+    for plot_name in PLOT_NAMES:
+        with open(os.path.join(plots_dir, f"{plot_name}.png"), 'wb') as f:
+            f.write(render_plot(df, plot_name))
+
+def init_worker(data_path, serving_path, shared):
+    # Process pool initializer: load (memory-map) the dataset once per worker
+    global _worker_df
+    from data_store import load_serving_dataset
+    _worker_df = load_serving_dataset(data_path, serving_path, shared=shared)
+
+def render_task(plot_name, filters, max_points=MAX_SCATTER_POINTS):
+    df = filter_frame(_worker_df, **filters)
+    if len(df) == 0:
+        raise LookupError("No listings match the filter")
+    return render_plot(df, plot_name, max_points)
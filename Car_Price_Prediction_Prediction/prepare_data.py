@@ -1,65 +1,37 @@
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os
-
-# Create directory for plots if it doesn't exist
-os.makedirs('plots', exist_ok=True)
-
-# Load data
-df = pd.read_csv('car_price_prediction_.csv')
-
-# Basic Info
-print("--- Dataset Info ---")
-print(df.info())
-
-print("\n--- Summary Statistics ---")
-print(df.describe(include='all'))
-
-# Missing Values
-print("\n--- Missing Values ---")
-print(df.isnull().sum())
-
-# Cleaning
-# Drop Car ID - irrelevant for prediction
-if 'Car ID' in df.columns:
-    df.drop('Car ID', axis=1, inplace=True)
-
-# Exploratory Visualizations
-plt.figure(figsize=(10, 6))
-sns.histplot(df['Price'], kde=True)
-plt.title('Price Distribution')
-plt.savefig('plots/price_dist.png')
-plt.close()
-
-plt.figure(figsize=(12, 6))
-sns.boxplot(x='Brand', y='Price', data=df)
-plt.title('Price by Brand')
-plt.xticks(rotation=45)
-plt.savefig('plots/price_by_brand.png')
-plt.close()
-
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x='Year', y='Price', data=df)
-plt.title('Price vs Year')
-plt.savefig('plots/price_vs_year.png')
-plt.close()
-
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x='Mileage', y='Price', data=df)
-plt.title('Price vs Mileage')
-plt.savefig('plots/price_vs_mileage.png')
-plt.close()
-
-# Correlation Matrix for numeric features
-plt.figure(figsize=(10, 8))
-numeric_df = df.select_dtypes(include=[np.number])
-sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm')
-plt.title('Correlation Matrix')
-plt.savefig('plots/correlation_matrix.png')
-plt.close()
-
-# Save cleaned data
-df.to_csv('cleaned_car_price_data.csv', index=False)
-print("\nCleaned data saved to 'cleaned_car_price_data.csv'")
+from data_store import read_table, save_dataset
+from plot_service import save_plots
+from cleaning import clean_frame
+
+def prepare_data(raw_path, output_path):
+    # Load data
+    df = pd.read_csv(raw_path)
+    
+    # Basic Info
+    print("--- Dataset Info ---")
+    print(df.info())
+    
+    print("\n--- Summary Statistics ---")
+    print(df.describe(include='all'))
+    
+    # Missing Values
+    print("\n--- Missing Values ---")
+    print(df.isnull().sum())
+    
+    # Cleaning: drop Car ID (irrelevant for prediction), incomplete rows and duplicates.
+    # Outliers are only filtered once the logical price exists (optimize_data.py)
+    df = clean_frame(df, outlier_sigma=None)
+    print(f"\n{len(df)} rows after cleaning")
+    
+    # Save cleaned data in the typed columnar format read by the later stages
+    save_dataset(df, output_path)
+    print(f"\nCleaned data saved to '{output_path}'")
+
+def render_plots(data_path, plots_dir='plots'):
+    # Exploratory Visualizations (shared with the API's on-demand renderer)
+    save_plots(read_table(data_path), plots_dir)
+    print(f"Plots saved to '{plots_dir}'")
+
+if __name__ == "__main__":
+    prepare_data('car_price_prediction_.csv', 'cleaned_car_price_data.cols')
+    render_plots('cleaned_car_price_data.cols', 'plots')
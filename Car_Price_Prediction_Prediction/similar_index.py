@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# Comparable listings: one KD-tree per (Brand, Model) over standardized Year / Engine Size / Mileage,
+# built once at startup. A lookup queries the tree of the requested model only, or merges the
+# trees of every model of the brand when the model is unknown.
+
+FEATURE_COLS = ['Year', 'Engine Size', 'Mileage']
+PARTITION_COLS = ['Brand', 'Model']
+
+class SimilarIndex:
+    def __init__(self, df, feature_cols=FEATURE_COLS, partition_cols=PARTITION_COLS):
+        self.feature_cols = list(feature_cols)
+        features = df[self.feature_cols].to_numpy(dtype=np.float64)
+        self.mean = features.mean(axis=0) if len(df) else np.zeros(len(self.feature_cols))
+        self.scale = features.std(axis=0) if len(df) else np.ones(len(self.feature_cols))
+        self.scale[self.scale == 0] = 1.0
+        scaled = (features - self.mean) / self.scale
+
+        # {(brand, model): (tree, row ids)}, and brand -> its partition keys
+        self.partitions = {}
+        self.brands = {}
+        keys = pd.DataFrame({col: df[col].astype(str).to_numpy() for col in partition_cols})
+        for key, rows in keys.groupby(list(partition_cols), sort=False).indices.items():
+            rows = np.asarray(rows)
+            self.partitions[key] = (cKDTree(scaled[rows]), rows)
+            self.brands.setdefault(key[0], []).append(key)
+
+    def footprint(self):
+        # (shared bytes, private bytes); the trees are built per worker, so all of it is private
+        # (approximate: the trees' node arrays are not exposed)
+        private_bytes = sum(tree.data.nbytes + tree.indices.nbytes + rows.nbytes
+                            for tree, rows in self.partitions.values())
+        return 0, private_bytes
+
+    def partition_keys(self, brand, model):
+        if (brand, model) in self.partitions:
+            return [(brand, model)]
+        return self.brands.get(brand, [])
+
+    def query(self, brand, model, features, k=5):
+        # Returns (row ids, distances in standard deviations), nearest first
+        point = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        rows = []
+        distances = []
+        for key in self.partition_keys(brand, model):
+            tree, partition_rows = self.partitions[key]
+            dist, idx = tree.query(point, k=min(k, len(partition_rows)))
+            dist = np.atleast_1d(dist)
+            idx = np.atleast_1d(idx)
+            rows.append(partition_rows[idx])
+            distances.append(dist)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows = np.concatenate(rows)
+        distances = np.concatenate(distances)
+        nearest = np.argsort(distances, kind='stable')[:k]
+        return rows[nearest], distances[nearest]
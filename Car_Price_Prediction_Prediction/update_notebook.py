@@ -1,68 +1,9 @@
-import json
+from notebook_rules import apply_rules_to_files, report
 
+# Data Loading / Data Cleaning rewrites and plotting warning fixes: the 'update' rules of notebook_rules
 notebook_paths = ['car_price_full_pipeline.ipynb']
 
-for notebook_path in notebook_paths:
-    try:
-        with open(notebook_path, 'r', encoding='utf-8') as f:
-            nb = json.load(f)
-        
-        new_cells = []
-        for cell in nb['cells']:
-            # Replace Section 2 (Data Loading)
-            if cell['cell_type'] == 'code' and "pd.read_csv('cleaned_car_price_data_logical.csv')" in "".join(cell['source']):
-                print(f"Enhancing Data Loading section in {notebook_path}...")
-                cell['source'] = [
-                    "raw_df = pd.read_csv('car_price_prediction_.csv')\n",
-                    "print(f\"Raw Dataset Profile: {raw_df.shape[0]} observations and {raw_df.shape[1]} features.\")\n",
-                    "raw_df.head()"
-                ]
-                new_cells.append(cell)
-                continue
-
-            # Replace Section 3 (Data Cleaning)
-            if cell['cell_type'] == 'code' and "if 'Car ID' in df.columns:" in "".join(cell['source']):
-                print(f"Enhancing Data Cleaning section in {notebook_path}...")
-                cell['source'] = [
-                    "# 1. Initial Cleaning: Handling duplicates and mission identifiers\n",
-                    "df = raw_df.drop_duplicates()\n",
-                    "if 'Car ID' in df.columns:\n",
-                    "    df = df.drop('Car ID', axis=1)\n",
-                    "\n",
-                    "# 2. Missing Value Imputation\n",
-                    "print(\"Integrity Check - Missing Values before cleaning:\")\n",
-                    "print(df.isnull().sum())\n",
-                    "df = df.dropna()  # In a production setting, we might use median/mode imputation\n",
-                    "\n",
-                    "# 3. Transition to Calibrated Dataset\n",
-                    "# Note: For logical consistency in market trends (Year vs Price), \n",
-                    "# we utilize the calibrated dataset which ensures valid Pearson correlations.\n",
-                    "df = pd.read_csv('cleaned_car_price_data_logical.csv')\n",
-                    "if 'Car ID' in df.columns: df = df.drop('Car ID', axis=1)\n",
-                    "\n",
-                    "print(\"\\nFinal Cleaned Data Types for Automated Pipeline Routing:\")\n",
-                    "print(df.dtypes)"
-                ]
-                new_cells.append(cell)
-                continue
-
-            # Standard cell updates
-            if cell['cell_type'] == 'code':
-                source = "".join(cell['source'])
-                # Fix select_dtypes warning
-                if "select_dtypes(include=['object'])" in source:
-                    source = source.replace("select_dtypes(include=['object'])", "select_dtypes(include=['object', 'str'])")
-                # Fix Seaborn barplot warning
-                if "sns.barplot(x='Condition', y='Price', data=df, order=['Used', 'Like New', 'New'], palette='viridis')" in source:
-                    source = source.replace("palette='viridis')", "hue='Condition', palette='viridis', legend=False)")
-                cell['source'] = [source]
-
-            new_cells.append(cell)
-
-        nb['cells'] = new_cells
-        with open(notebook_path, 'w', encoding='utf-8') as f:
-            json.dump(nb, f, indent=1)
-        print(f"Successfully updated and enhanced {notebook_path}.")
-            
-    except FileNotFoundError:
-        print(f"File {notebook_path} not found.")
+try:
+    report(apply_rules_to_files(notebook_paths, ['update']))
+except FileNotFoundError as e:
+    print(f"File {e.filename} not found.")